@@ -14,6 +14,8 @@ TEMP_DIR = os.path.join(ROOT_DIR, 'temp')
 CACHE_DIR = os.path.join(DATA_DIR, 'cache')
 VECTORDB_DIR = os.path.join(DATA_DIR, 'vectordb')
 INDICES_FILE = os.path.join(DATA_DIR, 'indices.json')
+INDICES_PICKLE_FILE = os.path.join(CACHE_DIR, 'indices.pkl')  # Parsed indices, rebuilt when indices.json changes
+CHUNKS_PICKLE_FILE = os.path.join(CACHE_DIR, 'chunks.pkl')  # Chunked corpus, rebuilt when source documents or chunk settings change
 
 # ChromaDB collection name
 COLLECTION_NAME = "historical_documents"
@@ -38,9 +40,11 @@ MAX_SENTENCES_PER_PARAGRAPH = 3  # Hard limit for paragraph length
 MAX_REVIEW_ITERATIONS = 2  # Maximum iterations for answer review/fixing (reduced to prevent timeouts)
 BATCH_SIZE = 20  # Process chunks in batches of this size (DEPRECATED - use token-based batching)
 BATCH_PAUSE_SECONDS = 5  # Pause between batches to avoid rate limits (reduced from 15 to speed up queries)
+BATCH_NARRATIVE_CONCURRENCY = 4  # Max concurrent batch calls in batched narratives (async mode only)
 CHUNK_RETRIEVAL_BATCH_SIZE = 200  # Batch size for retrieving chunks from database
 MAX_ANSWER_LENGTH = 15000  # Maximum answer length in characters (for truncation)
 QUERY_TIMEOUT_SECONDS = 420  # Maximum time for query processing (7 minutes, leaving buffer for frontend timeout)
+VERBOSE_QUERY_LOGGING = os.getenv('THUNDERCLAP_VERBOSE', '1') != '0'  # Per-call [LLM_CALL]/[DEDUP] progress lines (warnings/errors always print)
 
 # Token-based batching (more efficient than chunk count)
 MAX_TOKENS_PER_MINUTE = 250000  # Max tokens per minute (user limit)
@@ -48,6 +52,7 @@ MAX_TOKENS_PER_REQUEST = 200000  # Max tokens per API call (conservative limit u
 ESTIMATED_WORDS_PER_CHUNK = 400  # Average words per chunk (from CHUNK_SIZE)
 TOKENS_PER_WORD = 1.3  # Rough estimate: 1 word ≈ 1.3 tokens
 MAX_WORDS_PER_REQUEST = 150000  # Max words per request (~200K tokens / 1.3)
+CHARS_PER_TOKEN = 4  # Rough estimate: 1 token ≈ 4 characters
 
 # Answer review thresholds
 EARLY_STOP_GAP_THRESHOLD = 10  # Years gap threshold for detecting early stopping
@@ -10,21 +10,27 @@ import re
 class LLMAnswerGenerator:
     """Simplified LLM wrapper - just API calls, no prompt logic."""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, system_instruction=None, request_timeout=None):
         """
         Initialize LLM client.
         
         Args:
             api_key: Gemini API key (or set GEMINI_API_KEY env var)
+            system_instruction: Optional system prompt shared by every call on this client
+            request_timeout: Optional per-request timeout in seconds; timed-out calls are retried
         """
         self.api_key = api_key or os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY')
         self.client = None
+        self.request_timeout = request_timeout
+        self.system_instruction = system_instruction
+        # Extra generate_content kwargs (only set when a timeout is requested)
+        self._request_kwargs = {'request_options': {'timeout': request_timeout}} if request_timeout else {}
         
         # Try Gemini first
         if self.api_key:
             try:
                 from lib.llm_config import get_llm_client
-                self.client = get_llm_client()
+                self.client = get_llm_client(system_instruction=system_instruction)
             except Exception as e:
                 print(f"  [ERROR] Gemini setup failed: {e}")
                 self.client = None
@@ -67,6 +73,41 @@ class LLMAnswerGenerator:
             ("resource has been exhausted" in msg and "daily" in msg)
         )
     
+    def _is_auth_error(self, exc: Exception) -> bool:
+        """Check if the API rejected the key (invalid, expired or revoked)."""
+        msg = str(exc).lower()
+        return (
+            "api_key_invalid" in msg or
+            "api key not valid" in msg or
+            "api key expired" in msg or
+            "unauthenticated" in msg
+        )
+    
+    def _rebuild_client(self) -> bool:
+        """
+        Recreate the client with the key re-read from the environment.
+        Used once per call after an auth error, so one client can be reused across calls.
+        """
+        api_key = os.getenv('GEMINI_API_KEY') or os.getenv('GOOGLE_API_KEY') or self.api_key
+        try:
+            from lib.llm_config import get_llm_client
+            self.client = get_llm_client(system_instruction=self.system_instruction, api_key=api_key)
+            self.api_key = api_key
+            return True
+        except Exception as e:
+            print(f"  [ERROR] Gemini client rebuild failed: {e}")
+            return False
+    
+    def _is_timeout_error(self, exc: Exception) -> bool:
+        """Check if the request hit its deadline (client-side timeout or 504 Deadline Exceeded)."""
+        msg = str(exc).lower()
+        return (
+            isinstance(exc, (TimeoutError, asyncio.TimeoutError)) or
+            "deadline exceeded" in msg or
+            "504" in msg or
+            "timed out" in msg
+        )
+    
     def _extract_retry_delay(self, exc: Exception) -> float:
         """Extract retry delay from error message, or return default."""
         import re as re_module
@@ -80,12 +121,13 @@ class LLMAnswerGenerator:
             return float(match.group(1))
         return None  # Use exponential backoff
 
-    def call_api(self, prompt: str) -> str:
+    def call_api(self, prompt: str, max_attempts: int = 20) -> str:
         """
         Make a single API call with the given prompt.
         
         Args:
             prompt: Complete prompt string (built by prompts.py)
+            max_attempts: Retry limit (control queries pass fewer to avoid long waits)
         
         Returns:
             Generated text response
@@ -102,10 +144,11 @@ class LLMAnswerGenerator:
         import time
         start_time = time.time()
         max_total_time = 300  # 5 minutes maximum total wait time
-        # Allow temporary override for control queries (reduces retries to prevent timeout)
-        max_attempts = getattr(self, '_temp_max_attempts', 20)  # Default 20, override for control queries
         quota_error_count = 0  # Track consecutive quota errors
         max_quota_retries = 5  # Retry rate limit errors up to 5 times (was 3)
+        timeout_count = 0
+        max_timeout_retries = 2  # Only when request_timeout is set
+        client_rebuilt = False
         
         while attempts < max_attempts:
             # Check total timeout
@@ -114,7 +157,7 @@ class LLMAnswerGenerator:
                 raise Exception(f"API call timed out after {elapsed:.1f}s (max {max_total_time}s). Quota may be exhausted.")
             
             try:
-                response = self.client.generate_content(prompt)
+                response = self.client.generate_content(prompt, **self._request_kwargs)
                 # Check finish_reason: 0=UNSPECIFIED, 1=STOP (normal), 2=MAX_TOKENS, 3=SAFETY, 4=RECITATION
                 if response.candidates and len(response.candidates) > 0:
                     candidate = response.candidates[0]
@@ -159,6 +202,22 @@ class LLMAnswerGenerator:
                 error_msg = str(e)
                 print(f"  [ERROR] API call failed: {error_msg}")
                 
+                if not client_rebuilt and self._is_auth_error(e):
+                    client_rebuilt = True
+                    print("  [RETRY] API key rejected, rebuilding client with the current key")
+                    if self._rebuild_client():
+                        attempts += 1
+                        continue
+                
+                if self.request_timeout and timeout_count < max_timeout_retries and self._is_timeout_error(e):
+                    timeout_count += 1
+                    wait_time = min(backoff, 60)
+                    print(f"  [RETRY] Request timed out ({self.request_timeout}s), retrying in {wait_time:.1f}s (attempt {timeout_count}/{max_timeout_retries})")
+                    backoff = min(backoff * 2, 60.0)
+                    time.sleep(wait_time)
+                    attempts += 1
+                    continue
+                
                 if self._is_rate_limit_error(e):
                     quota_error_count += 1
                     # Fail fast if we've hit quota errors too many times
@@ -240,6 +299,9 @@ class LLMAnswerGenerator:
         max_attempts = 20  # Increased for quota errors
         quota_error_count = 0  # Track consecutive quota errors
         max_quota_retries = 5  # Retry rate limit errors up to 5 times (was 3)
+        timeout_count = 0
+        max_timeout_retries = 2  # Only when request_timeout is set
+        client_rebuilt = False
         
         while attempts < max_attempts:
             # Check total timeout
@@ -247,7 +309,7 @@ class LLMAnswerGenerator:
             if elapsed > max_total_time:
                 raise Exception(f"Async API call timed out after {elapsed:.1f}s (max {max_total_time}s). Quota may be exhausted.")
             try:
-                response = await self.client.generate_content_async(prompt)
+                response = await self.client.generate_content_async(prompt, **self._request_kwargs)
                 # Check finish_reason: 0=UNSPECIFIED, 1=STOP (normal), 2=MAX_TOKENS, 3=SAFETY, 4=RECITATION
                 if response.candidates and len(response.candidates) > 0:
                     candidate = response.candidates[0]
@@ -292,6 +354,22 @@ class LLMAnswerGenerator:
                 error_msg = str(e)
                 print(f"  [ERROR] Async API call failed: {error_msg}")
                 
+                if not client_rebuilt and self._is_auth_error(e):
+                    client_rebuilt = True
+                    print("  [RETRY] API key rejected, rebuilding client with the current key")
+                    if self._rebuild_client():
+                        attempts += 1
+                        continue
+                
+                if self.request_timeout and timeout_count < max_timeout_retries and self._is_timeout_error(e):
+                    timeout_count += 1
+                    wait_time = min(backoff, 60)
+                    print(f"  [RETRY] Async request timed out ({self.request_timeout}s), retrying in {wait_time:.1f}s (attempt {timeout_count}/{max_timeout_retries})")
+                    backoff = min(backoff * 2, 60.0)
+                    await asyncio.sleep(wait_time)
+                    attempts += 1
+                    continue
+                
                 if self._is_rate_limit_error(e):
                     quota_error_count += 1
                     # Fail fast if we've hit quota errors too many times
@@ -22,24 +22,31 @@ GENERATION_CONFIG = {
     "candidate_count": 1,
 }
 
-def get_llm_client():
+def get_llm_client(system_instruction=None, api_key=None):
     """
     Get a configured Gemini LLM client.
     
+    Args:
+        system_instruction: Optional fixed instructions sent as the system prompt, so
+            repeated calls only carry their varying content in the prompt itself
+        api_key: Optional key to configure instead of the one read at import time
+    
     Returns:
         genai.GenerativeModel: Configured Gemini model
     
     Raises:
         Exception: If API key is not set or model initialization fails
     """
-    if not GEMINI_API_KEY:
+    api_key = api_key or GEMINI_API_KEY
+    if not api_key:
         raise Exception("No API key found. Set GEMINI_API_KEY environment variable.")
     
-    genai.configure(api_key=GEMINI_API_KEY)
+    genai.configure(api_key=api_key)
     
     client = genai.GenerativeModel(
         model_name=GEMINI_MODEL,
         generation_config=GENERATION_CONFIG,
+        system_instruction=system_instruction,
     )
     
     print(f"  [OK] Gemini API configured ({GEMINI_MODEL})")
@@ -8,19 +8,33 @@ Routes to specialized engines (MarketEngine, IdeologyEngine, EventEngine, Period
 based on detected query type, with fallback to general processing.
 """
 
+import io
 import os
 import json
+import pickle
 import re
-from itertools import chain
+import sys
+import time
+import uuid
+import asyncio
+import hashlib
+import heapq
+import threading
+import traceback
+from collections import deque
+from functools import lru_cache
+from operator import itemgetter
 import chromadb
 from typing import List, Dict, Optional, Tuple, Set
 from .config import (
-    VECTORDB_DIR, INDICES_FILE, COLLECTION_NAME, DEFAULT_TOP_K,
+    DATA_DIR, CACHE_DIR, VECTORDB_DIR, INDICES_FILE, INDICES_PICKLE_FILE, COLLECTION_NAME, DEFAULT_TOP_K,
     MAX_SENTENCES_PER_PARAGRAPH, MAX_REVIEW_ITERATIONS, BATCH_SIZE, BATCH_PAUSE_SECONDS,
     CHUNK_RETRIEVAL_BATCH_SIZE, EARLY_STOP_GAP_THRESHOLD, SPARSE_RESULTS_THRESHOLD,
     MAX_TOKENS_PER_REQUEST, MAX_TOKENS_PER_MINUTE, ESTIMATED_WORDS_PER_CHUNK, TOKENS_PER_WORD, MAX_WORDS_PER_REQUEST,
+    CHARS_PER_TOKEN, BATCH_NARRATIVE_CONCURRENCY,
     CONTROL_INFLUENCE_EARLY_CHUNK_LIMIT, CONTROL_INFLUENCE_FINAL_CHUNK_LIMIT,
-    CONTROL_INFLUENCE_MAX_RETRIES, CONTROL_INFLUENCE_SLOW_THRESHOLD_SECONDS
+    CONTROL_INFLUENCE_MAX_RETRIES, CONTROL_INFLUENCE_SLOW_THRESHOLD_SECONDS,
+    QUERY_TIMEOUT_SECONDS, VERBOSE_QUERY_LOGGING
 )
 from .llm import LLMAnswerGenerator
 from .engines.market_engine import MarketEngine
@@ -33,6 +47,488 @@ from .constants import YEAR_PREFIX_EXPANSIONS, STOP_WORDS
 from .text_utils import split_into_sentences
 from .answer_reviewer import AnswerReviewer
 
+# Optional: Aho-Corasick automaton for scanning chunks against all index terms at once
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Optional: orjson parses the large JSON caches several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: xxhash for compact dedup keys; hashlib.blake2b digests without it
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Optional: numba-compiled year scanner for large chunk sets; regex fallback without it
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(cache=True)
+    def _is_word_cp(cp):
+        """
+        Whether the code point is a regex word character, as _YEAR_RE's \\b sees it: exact for
+        ASCII; other characters count as word characters except the punctuation and symbol
+        blocks common in prose (Latin-1 symbols, × ÷, dashes/quotes, CJK punctuation).
+        """
+        if cp < 0x80:
+            return (48 <= cp <= 57) or (65 <= cp <= 90) or (97 <= cp <= 122) or cp == 95
+        if cp <= 0xBF:
+            # Latin-1 punctuation and symbols; only ª ² ³ µ ¹ º ¼ ½ ¾ are word characters
+            return cp == 0xAA or cp == 0xB2 or cp == 0xB3 or cp == 0xB5 or cp == 0xB9 or cp == 0xBA or 0xBC <= cp <= 0xBE
+        if cp == 0xD7 or cp == 0xF7:  # × ÷
+            return False
+        if 0x2000 <= cp <= 0x206F or 0x3000 <= cp <= 0x303F:  # dashes, curly quotes, ellipsis; CJK punctuation
+            return False
+        return True
+
+    @njit(cache=True)
+    def _code_point_at(buf, j):
+        """Decode the UTF-8 character whose lead byte is at j."""
+        cp = int(buf[j])
+        if cp < 0xC0:
+            return cp  # ASCII (or a stray continuation byte)
+        if cp >= 0xF0:
+            extra = 3
+            cp &= 0x07
+        elif cp >= 0xE0:
+            extra = 2
+            cp &= 0x0F
+        else:
+            extra = 1
+            cp &= 0x1F
+        for k in range(1, extra + 1):
+            if j + k >= buf.shape[0]:
+                break
+            cp = (cp << 6) | (int(buf[j + k]) & 0x3F)
+        return cp
+
+    @njit(cache=True)
+    def _word_before(buf, i):
+        """True if the character ending just before byte i is a word character."""
+        j = i - 1
+        while j > 0 and (buf[j] & 0xC0) == 0x80:
+            j -= 1
+        return _is_word_cp(_code_point_at(buf, j))
+
+    @njit(cache=True)
+    def _minmax_year_jit(buf):
+        """Min/max of standalone 1600-2029 years in a UTF-8 byte array; (0, 0) if none."""
+        n = buf.shape[0]
+        mn = 0
+        mx = 0
+        i = 0
+        while i + 3 < n:
+            if (i == 0 or not _word_before(buf, i)) and (i + 4 == n or not _is_word_cp(_code_point_at(buf, i + 4))):
+                d0 = buf[i] - 48
+                d1 = buf[i + 1] - 48
+                d2 = buf[i + 2] - 48
+                d3 = buf[i + 3] - 48
+                if 0 <= d0 <= 9 and 0 <= d1 <= 9 and 0 <= d2 <= 9 and 0 <= d3 <= 9:
+                    year = d0 * 1000 + d1 * 100 + d2 * 10 + d3
+                    if 1600 <= year <= 2029:
+                        if mn == 0 or year < mn:
+                            mn = year
+                        if year > mx:
+                            mx = year
+                        i += 4
+                        continue
+            i += 1
+        return mn, mx
+
+
+# Years 1600-2029 as they appear in the source text
+_YEAR_RE = re.compile(r"\b(1[6-9]\d{2}|20[0-2]\d)\b")
+
+
+def _dedup_key(normalized: str):
+    """Fixed-size digest of a normalized sentence, so dedup sets don't hold copies of the text."""
+    data = normalized.encode('utf-8')
+    if xxhash is not None:
+        return xxhash.xxh3_64_intdigest(data)
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def _chunk_cache(chunk: tuple) -> Optional[dict]:
+    """
+    Per-chunk scratch cache stored on the chunk's meta dict. Filters that shorten a
+    chunk reuse its meta with new text, so the cache is reset whenever the text differs.
+    Returns None when meta is not a dict.
+    """
+    text, meta = chunk
+    if not isinstance(meta, dict):
+        return None
+    cache = meta.get('_chunk_cache')
+    if cache is None or cache.get('text') is not text:
+        cache = {'text': text}
+        meta['_chunk_cache'] = cache
+    return cache
+
+
+def _chunk_word_count(chunk: tuple) -> int:
+    """Whitespace word count of a (text, meta) chunk (cached)."""
+    cache = _chunk_cache(chunk)
+    if cache is None:
+        return len(chunk[0].split())
+    wc = cache.get('wc')
+    if wc is None:
+        wc = len(chunk[0].split())
+        cache['wc'] = wc
+    return wc
+
+
+def _text_lower(chunk: tuple) -> str:
+    """Lowercased text of a (text, meta) chunk (cached), shared by the keyword filters."""
+    cache = _chunk_cache(chunk)
+    if cache is None:
+        return chunk[0].lower()
+    tl = cache.get('lower')
+    if tl is None:
+        tl = chunk[0].lower()
+        cache['lower'] = tl
+    return tl
+
+
+# Law tokens such as BA1933 / BHCA1956 (code, year)
+_LAW_TOKEN_RE = re.compile(r"\b(BHCA|BA|TA|SA|FA|IA|AA|PA|DA|CA|EA|LA)(\d{4})\b", re.IGNORECASE)
+
+# Parenthesized content in questions, e.g. "(Rothschild)"
+_PAREN_RE = re.compile(r"\(([^)]+)\)")
+
+# Paragraph / sentence boundaries used by the paragraph-length checks
+_PARA_SPLIT_RE = re.compile(r"\n\s*\n")
+_SENT_BOUND_RE = re.compile(r"[.!?](?:\s|$)")
+
+# Keyword families for ideology routing/filtering (substring matches on lowercased text)
+_IDEOLOGY_TERMS = frozenset({
+    "marxism", "marxist", "socialism", "socialist", "communism", "communist", "collectivism", "collectivist"
+})
+_IDEOLOGY_FINANCE_TERMS = frozenset({
+    "bank", "banking", "credit", "money", "market", "securities", "bond", "equity",
+    "stock", "capital", "liquidity", "exchange", "regulation", "balance sheet",
+    "benchmark", "margin"
+})
+_IDEOLOGY_TRANSITION_TERMS = frozenset({
+    "nationalize", "nationalised", "nationalized", "collectivize", "collectivised", "collectivized",
+    "expropriate", "expropriation", "confiscate", "decree", "five-year plan", "plan economy",
+    "state bank", "central plan", "command economy", "price control", "currency reform"
+})
+_IDEOLOGY_CRISIS_TERMS = frozenset({
+    "panic", "panics", "crisis", "crises", "1763", "1825", "1873", "1893", "1907", "1929", "1973", "1974", "1987", "1998", "2008"
+})
+_IDEOLOGY_IDENTITY_TERMS = frozenset({
+    "minority", "women", "widow", "gender", "race", "caste", "dalit", "brahmin",
+    "jew", "jewish", "quaker", "huguenot", "armenian", "greek", "boston brahmin",
+    "old believer", "parsee", "baniya", "sephardi", "ashkenazi", "court jew"
+})
+
+def _write_chunk(buf: io.StringIO, number: int, text: str) -> None:
+    """Append one '--- CHUNK n ---' section to buf (blank line between sections)."""
+    if number > 1:
+        buf.write("\n\n")
+    buf.write("--- CHUNK ")
+    buf.write(str(number))
+    buf.write(" ---\n")
+    buf.write(text)
+
+
+def _render_chunks(chunks: list) -> str:
+    """Render (text, meta) chunks as numbered '--- CHUNK n ---' sections for prompts."""
+    buf = io.StringIO()
+    for number, (text, _meta) in enumerate(chunks, 1):
+        _write_chunk(buf, number, text)
+    return buf.getvalue()
+
+
+# Static prompt bodies, split around the dynamic question/chunk slots so every call
+# sends a byte-identical instruction block without re-parsing an f-string.
+_CTRL_PREFIX = """You are a banking historian. Answer this question: """
+_CTRL_MIDDLE = """
+
+DOCUMENT CHUNKS:
+"""
+_CTRL_SUFFIX = """
+
+CRITICAL GUIDANCE FOR CONTROL/INFLUENCE QUESTIONS:
+
+ABSOLUTE REQUIREMENT: Your answer MUST follow this EXACT structure. Do NOT deviate.
+
+MANDATORY STRUCTURE - FOLLOW THIS EXACT ORDER (DO NOT SKIP STEPS):
+
+1. PREMISE REJECTION (MANDATORY FIRST STEP - YOUR ANSWER MUST START HERE):
+   - YOUR FIRST SENTENCE MUST explicitly reject the premise as unsupported and consistent with conspiratorial or reductionist thinking
+   - State clearly that no group uniformly controls complex economic systems
+   - NEVER mention "documents", "the provided documents", "as depicted in these documents", "the documents indicate", "historical documents", "historical records", "historical evidence", "records show", or any source material
+   - BAD: "While specific Jewish families made significant contributions..." (starts with examples, not rejection)
+   - BAD: "The assertion that Jews control banking is addressed..."
+   - BAD: "The provided documents explicitly state..."
+   - GOOD: "The premise that any single ethnic, religious, or social group controls banking is unsupported and reflects conspiratorial thinking. No group uniformly controls complex economic systems."
+   - CRITICAL: If you do not start with premise rejection, your answer is WRONG
+
+2. CONTEXTUALIZATION AND LIMITS:
+   - Explain that any historical examples reflect participation by specific individuals or elite families under contextual constraints, not group-wide authority
+   - Emphasize selection bias in citing only prominent cases (what gets remembered vs. what gets forgotten)
+   - Clarify that participation was constrained, not dominant
+
+3. EVIDENCE/EXAMPLES FRAMED AS PARTICIPATION UNDER CONSTRAINT:
+   - Present evidence ONLY as examples of LIMITED participation by specific actors operating under constraints
+   - Which SPECIFIC families? (e.g., "Rothschild, Warburg, and Kuhn Loeb families" NOT "all Jews")
+   - What SPECIFIC time period? (e.g., "in 19th century Frankfurt" NOT "throughout history")
+   - What SPECIFIC place? (e.g., "in London" NOT "globally")
+   - Banking dominated by COUSINHOODS (small intermarried elite families), NOT entire populations
+   - Highlight that activities occurred under legal/social pressure (threats of expulsion/exclusion) rather than voluntary dominance
+   - Note government-imposed restrictions that pushed populations into specific economic roles
+   - Do NOT describe historical networks or family ties as coordinated group strategies unless explicitly evidenced
+   - Never infer collective will - frame as individual/family actions under constraints
+
+4. COUNTEREXAMPLES AND VULNERABILITY (MANDATORY):
+   - MANDATORY: Include counterexamples involving non-members of the group:
+     * Quakers (Barclay, Lloyd, Bevan), Huguenots (Hope, Mallet, Thellusson), Parsees (Tata, Wadia, Petit), Mennonites (Clercq, Fock, TenCate), Boston Brahmins (Cabot, Lowell, Forbes), Protestant Cologne (Stein, Schaaffhausen), Greeks, Armenians, etc.
+   - MANDATORY: Include instances of failure, vulnerability, or suppression:
+     * Financial defaults (e.g., Oppenheim collapse)
+     * Assassinations, executions, political persecution
+     * Expulsions and social exclusion
+   - MANDATORY: Include GOVERNMENT-IMPOSED RESTRICTIONS that pushed individuals into specific economic roles:
+     * Legal restrictions (e.g., restrictions on Jews in Frankfurt, prohibitions on land ownership, guild exclusions)
+     * Exclusion from other economic realms (politics, land ownership, certain trades/industries)
+     * Religious prohibitions on credit/usury that affected other groups (e.g., Christian prohibitions on lending at interest)
+     * These restrictions channeled certain populations into finance, not voluntary choice
+   - MANDATORY: Include THREATS TO COMMUNITIES:
+     * Threats of expulsion (actual expulsions or threats thereof)
+     * Social exclusion and discrimination
+     * Political interference and persecution
+   - MANDATORY: Include OTHER COMPETITORS AND GROUPS:
+     * Other identity groups (Quakers, Huguenots, Parsees, Mennonites, Boston Brahmins, Protestant Cologne, Greeks, Armenians, etc.)
+     * Religious prohibitions on credit/usury that affected other groups (e.g., Christian prohibitions on lending at interest that created opportunities for certain groups)
+     * Show that banking involved many groups, not just the queried group
+   - Show that participation was precarious and subject to sudden reversals
+   - Include examples of individuals/families who faced persecution, expulsion, or financial ruin
+   - CRITICAL: If chunks mention restrictions (e.g., Frankfurt restrictions), exclusion from politics/land/other realms, threats of expulsion, religious prohibitions on credit, or other competitors, you MUST include them - these are essential context
+
+5. CONCLUSION REAFFIRMING LACK OF COLLECTIVE CONTROL:
+   - Reaffirm that no group uniformly controls banking
+   - Emphasize that participation was limited, constrained, and occurred alongside many other groups
+   - Frame the pattern as one of small intermarried elite families across many groups, not unique to any single group
+
+6. IF NO EVIDENCE FOR THE CLAIM:
+   - State explicitly: "The document does not provide support for this claim."
+   - Do NOT infer beyond the text
+
+MAINTAIN NEUTRAL, EVIDENCE-BASED TONE:
+- Provide historical context without moralizing language or ideological assumptions
+- Use a factual style
+- Limit generalizations, avoid proxy language, and do not speculate beyond provided sources
+
+FINAL CHECKLIST BEFORE SUBMITTING:
+- [ ] Does your answer START with premise rejection? If NO → REWRITE
+- [ ] Did you mention "documents", "provided documents", "as depicted in", "the documents indicate", or any source material? If YES → DELETE and rewrite
+- [ ] Did you follow the exact order: (1) Premise rejection → (2) Contextualization → (3) Evidence → (4) Counterexamples → (5) Conclusion? If NO → REORGANIZE
+- [ ] Did you include counterexamples from other groups? If NO → ADD THEM
+- [ ] Did you include failures/vulnerabilities? If NO → ADD THEM
+
+7. CHRONOLOGICAL ORGANIZATION: Cover all time periods documents mention, moving forward chronologically.
+
+8. END WITH RELATED QUESTIONS: 3-5 questions about specific families, institutions, or time periods mentioned in documents.
+
+Answer:
+"""
+
+_MARKET_PREFIX = """You are a banking historian. Answer this question: """
+_MARKET_MIDDLE = """
+
+DOCUMENT CHUNKS:
+"""
+_MARKET_SUFFIX = """
+
+MARKET/ASSET CLASS RULES:
+1) STRUCTURE:
+   - Use section headings (e.g., "**Origins & Stimulation Factors:**", "**Funding & Participants:**", "**Pricing & Benchmarks:**", "**Regulation & Balance Sheets:**", "**Panics & Crises:**").
+   - 2–4 paragraphs per section; MAX 3 sentences per paragraph; MIN 5 paragraphs total.
+   - Within sections, PRESENT FACTS IN STRICT CHRONOLOGICAL ORDER (e.g., 1950s → 1960s → 1970s → 1980s → 1990s → 2000s).
+2) STIMULATION FACTORS (MANDATORY - MUST INCLUDE):
+   - ALWAYS include an "Origins & Stimulation Factors" section or integrate stimulation factors into the opening
+   - Explain WHAT CREATED/DROVE the market: laws (e.g., National Bank Act, Banking Act of 1933), innovations (e.g., silicon transistors, venture capital), economic conditions (e.g., post-war growth, deregulation), wars (e.g., WWII, Cold War), panics (e.g., Panic of 1907 led to Federal Reserve Act), regulatory changes (e.g., SEC creation, Glass-Steagall repeal)
+   - BAD: "The technology equities sector emerged significantly in the mid-20th century" (no explanation of WHY or WHAT drove it)
+   - GOOD: "The technology equities sector emerged in the mid-20th century, driven by Cold War defense spending on semiconductors, the rise of venture capital funding structures, and innovations in silicon transistor technology that enabled commercial applications."
+   - MANDATORY: Search chunks for laws, innovations, economic conditions, wars, panics, regulatory changes that stimulated the market's creation/growth
+3) PANICS/CRISES (MANDATORY WHEN PRESENT IN SOURCES):
+   - Explicitly cover relevant panics/crises linked to the subject (e.g., 1763, 1825, 1873, 1893, 1907, 1929, 1973–74, 1987, 1998, 2000 dot-com crash, 2008 financial crisis).
+   - Explain how liquidity, margining, benchmarks, or dealer balance sheets changed in this market during those episodes.
+   - MANDATORY: If documents mention panics/crises during periods when the market was active, you MUST include them - don't skip panics
+   - BAD: Answer about technology equities mentions 1950s-2000s but no mention of dot-com crash (2000) or 2008 financial crisis if documents mention them
+   - GOOD: "During the dot-com crash of 2000, technology equities [specific impacts from docs]. Following the 2008 financial crisis, technology equities [specific impacts from docs]."
+4) SUBJECT ACTIVE:
+   - Keep the market/asset as the active subject in each sentence.
+5) MECHANICS:
+   - Institutions italicized (e.g., *MMEU*, *FRS*, *NYSE*); people normal.
+   - Strict relevance; no unrelated context.
+6) COVERAGE:
+   - Move forward in time across all eras present; short transitions to connect periods.
+7) END:
+   - "Related Questions:" with 3–5 substantial, document-grounded items.
+"""
+
+_IDEOLOGY_PREFIX = """You are a banking historian. Answer this question through an IDEOLOGY → SOCIETY & FINANCE lens: """
+_IDEOLOGY_MIDDLE = """
+
+DOCUMENT CHUNKS:
+"""
+_IDEOLOGY_SUFFIX = """
+
+IDEOLOGY → FINANCE RULES:
+1) SUBJECT ACTIVE (ALWAYS): Keep the ideology as the subject in every sentence (e.g., "Marxism shaped bank nationalization...").
+2) SOCIETY & STATE (MANDATORY): Focus on nationalization/collectivization mechanics, property rights, redistribution, repression or protections, and how the state reallocated economic control.
+3) PANICS/CRISES (MANDATORY WHEN PRESENT): If sources mention panics/crises (1763, 1825, 1873, 1893, 1907, 1929, 1973–74, 1987, 1998, 2008), explain social effects: employment, credit access, expropriations, migration, class/caste conflict, and changes to who could access finance.
+4) IDENTITY (MANDATORY WHEN PRESENT): Explain effects on minorities and identity groups documented in the sources (e.g., exclusions or access for Jews, Quakers, Dalits, women/widows), and how those shaped roles (minority middlemen).
+5) STRICT RELEVANCE: Avoid unrelated event/name “laundry lists.” Do NOT jump across unrelated locales. Do NOT introduce new people unless the documents show a direct tie to the subject; when a person is named, state in 1 short clause why they matter to this ideology’s effect on banking/society.
+6) FINANCIAL MECHANICS (WHEN PRESENT): Banking structure, credit allocation, benchmarks, dealer/state balance sheets—only as they inform social outcomes.
+7) CHRONOLOGY WITH TRANSITIONS: Move forward in time (e.g., 1910s → 1930s → 1950s). Use explicit transitions that explain how one period leads to the next. Do not mix decades in the same paragraph.
+8) PARAGRAPHS: MAX 3 sentences per paragraph; MIN 5 paragraphs total.
+9) MECHANICS: Institutions italicized (e.g., *FRS*, *NYSE*, *Banque de France*); people normal. No platitudes.
+10) END: "Related Questions:" with 3–5 substantial, document-grounded items.
+
+ENTITY INTRODUCTIONS (MANDATORY):
+- Expand acronyms/institutions on first mention with role (e.g., "*Vneshtorg* (Soviet Bank for Foreign Trade)").
+- For each person first mentioned, add role + relevance to SUBJECT in one short clause; otherwise omit the name.
+- Do NOT use unknown acronyms (e.g., BSU) unless you define them from the provided chunks; if the chunks do not define, avoid using them.
+- For any non-subject entity mentioned (person or institution), explicitly state in the same sentence how they relate to the SUBJECT.
+"""
+
+_GROUNDED_PREFIX = """Answer this question USING ONLY the information in the DOCUMENT CHUNKS. If the chunks do not contain an item, do not invent it.
+
+QUESTION:
+"""
+_GROUNDED_CHUNKS_HEAD = """
+
+DOCUMENT CHUNKS ("""
+_GROUNDED_CHUNKS_TAIL = """ chunks):
+"""
+_GROUNDED_RULES_HEAD = """
+
+STRICT RULES:
+1) Use ONLY facts explicitly present in the chunks; do not speculate or add outside knowledge.
+2) Keep the SUBJECT active in every sentence; do not drift to unrelated entities.
+3) Expand acronyms on first use if the expansion appears in the chunks; otherwise avoid the acronym.
+4) Introduce people/entities with a one-clause role and relevance to the SUBJECT, but only if stated in the chunks.
+5) CHRONOLOGICAL COVERAGE (MANDATORY - CRITICAL): The chunks contain information spanning """
+_GROUNDED_RULES_FIRST = """. You MUST cover ALL eras from """
+_GROUNDED_RULES_LAST = """ to """
+_GROUNDED_RULES_ARROW = """. Do NOT stop at an early period. Move forward chronologically: """
+_GROUNDED_RULES_TAIL = """. Do not skip any decades or centuries present in the chunks.
+6) Organize chronologically with short transitions; MAX 3 sentences per paragraph; MIN 5 paragraphs (or more if multiple eras are present - aim for 1-2 paragraphs per major era).
+7) End with "Related Questions:" based on entities/topics that appear in the chunks (only if answerable from them).
+"""
+
+# General narrative prompt; filled with str.format_map (question, chunks_text)
+_PROMPT_TEMPLATE = """You are a banking historian. Answer this question: {question}
+
+DOCUMENT CHUNKS:
+{chunks_text}
+
+CRITICAL FRAMEWORK - Create THEMATIC narrative with CULTURAL ANALYSIS:
+
+1. STRUCTURE - THEMATIC SECTIONS with multiple focused paragraphs:
+   - Use section headings: "**Theme Name:**"
+   - Each section = 2-4 paragraphs on ONE theme
+   - Example: "**British Colonial Impact:**" then 3 paragraphs about EIC, Brahmins, Dalits
+
+2. PARAGRAPH LENGTH (HARD LIMIT - COUNT SENTENCES):
+   - MAXIMUM 3 sentences per paragraph
+   - After 3 sentences, MANDATORY break
+   - Each paragraph = one subtopic within section theme
+
+3. ENTITY INTRODUCTIONS (MANDATORY):
+   - When first mentioning an acronym or institution, expand it once in-line with role (e.g., "*Vneshtorg* (Soviet Bank for Foreign Trade, EXIM role)").
+   - When first mentioning a person, add a 1-clause apposition with role and why relevant to the SUBJECT (e.g., "Viktor Gerashchenko, Vneshtorg deputy who managed foreign credits").
+   - NO name-dropping. If you cannot state relevance in one clause, omit the name.
+   - DO NOT use an acronym (e.g., BSU) unless you can define it from the provided chunks in-line. If definition is not present in the chunks, avoid using the acronym.
+   - For every non-subject entity mentioned, explicitly state its relationship to the SUBJECT in the same sentence.
+
+3. COMPARATIVE ANALYSIS - Draw comparisons across groups when relevant:
+   - PARALLEL PATTERNS: Multiple groups showing same dynamics (endogamy, exclusion)
+   - CONTRASTING TREATMENT: Different treatment of similar groups
+     Example: "As Russia restricted Jewish rights in 1880, it expanded Old Believer freedoms in 1883"
+   - COMPETITION/COLLABORATION: Groups competing or partnering
+     Example: "Bukharan Jewish factories rivaled Old Believer counterparts in Moscow"
+    - HIERARCHY: Show how groups related (Brahmin dominance excluded Dalits)
+    - Draw comparisons only when supported by the documents
+
+4. DEFINE SPECIALIZED TERMS on first use:
+   - Dalit (untouchable, lowest Hindu caste, faced severe discrimination)
+   - Brahmin (priestly caste, highest in Hindu hierarchy)
+   - Kohanim (Jewish priestly caste), Court Jew (banker to monarchs)
+   - Old Believers (Russian Orthodox sect, split after 17th century reforms)
+   - Always explain hierarchy/status
+
+5. PARAGRAPH RULES (HARD LIMITS):
+   - MAX 3 sentences per paragraph (COUNT THEM). If over 3, SPLIT.
+   - MIN 5 paragraphs total (≥3 if content is truly limited to one era).
+   - ONE clear topic per paragraph; use transitions ("Building on this...", "During this period...", "As a result...").
+
+6. WRITING STYLE:
+   - BERNANKE: Causal analysis
+   - MAYA ANGELOU: Humanizing details
+   - NO LIST-LIKE WRITING
+
+6. MECHANICS:
+   - SUBJECT ACTIVE: *Rothschild* hired (NOT was hired by)
+   - Institutions italicized: *Rothschild*, *Hope*, *Securities and Exchange Commission (SEC)* when relevant
+   - People regular: e.g., Joseph P. Kennedy Sr.
+   - NO PLATITUDES
+
+7. COVERAGE & CONSISTENCY:
+   - Cover all eras present in the provided documents; do not stop at an early decade if later decades are present.
+   - For city/branch or successor cases, include the successor era if mentioned or add a "See also" in Related Questions.
+   - End with "Related Questions:" (3–5 precise, document-grounded items; no generic "impact/why" questions).
+
+Generate a thematically organized narrative with cultural explanations:"""
+
+# Canonical crisis years used by the panic/crisis heuristics
+_CRISIS_YEAR_SET = frozenset({"1973", "1974", "1987", "1998", "2008", "1929", "1907", "1825", "1873"})
+
+# Market/asset phrases that route a question to the market engine
+_MARKET_KEYWORDS = (
+    'money market', 'money-market', 'capital market', 'bond market', 'commercial paper', 'commercial-paper',
+    'abcp', 'mmeu', 'mmea', 'eurodollar', 'euro-dollar', 'euro dollar', 'eurodollar market', 'euro-market', 'euro market',
+    'libor', 'eurobond', 'railroad securities', 'reit', 'real estate trust', 'real-estate trust',
+    'conglomerate stock', 'technology stock', 'tech stock',
+    'slave market', 'diversity finance', 'dei investments',
+    'long-term capital', 'asset-backed', 'asset backed', 'junk bond', 'high-yield', 'high yield',
+    'venture capital', 'lbo', 'leveraged buyout', 'money fund', 'money-fund', 'money market mutual fund',
+    'trade bills', 'bills payable', 'foreign trade bills', 'legal tender notes', 'legal-tender notes',
+    'bank holding company act', 'holding company', 'market mutual fund'
+)
+
+# Pure question/answer classifiers, cached because the router re-checks the same strings
+@lru_cache(maxsize=512)
+def _is_market_query_cached(question: str) -> bool:
+    question_lower = question.lower()
+    return any(keyword in question_lower for keyword in _MARKET_KEYWORDS)
+
+
+@lru_cache(maxsize=512)
+def _is_ideology_query_cached(question: str) -> bool:
+    q = question.lower()
+    return any(k in q for k in _IDEOLOGY_TERMS)
+
+
+@lru_cache(maxsize=128)
+def _needs_grounding_cached(text: str) -> bool:
+    if "no relevant information found" in text.lower():
+        return True
+    # Too short or too few paragraphs
+    if len(text.strip()) < 300:
+        return True
+    return sum(1 for p in _PARA_SPLIT_RE.split(text.strip()) if p.strip()) < 3
 
 
 SUBJECT_GENERIC_TERMS = {
@@ -70,12 +566,16 @@ class QueryEngine:
             gemini_api_key: Optional Gemini API key for LLM answers
             use_async: If False, disables async optimization (for FastAPI compatibility)
         """
-        import time
         print("Connecting to document database...")
         self.use_async = use_async
         # Token rate limiting: track tokens used per minute
-        self._token_usage = []  # List of (timestamp, tokens) tuples
+        self._token_usage = deque()  # (timestamp, tokens) tuples, oldest first
+        self._token_usage_sum = 0  # Running total of tokens in _token_usage
+        self._token_usage_lock = threading.Lock()  # The server runs queries on several threads
+        self._thread_state = threading.local()  # Per-thread query diagnostics (last_chunk_count)
         self._token_rate_limit = MAX_TOKENS_PER_MINUTE
+        self._dedup_cache = None  # parsed deduplicated_cache.json, reloaded when the file changes
+        self._dedup_cache_mtime = 0
         
         # Connect to ChromaDB - simple approach matching archived versions
         self.chroma_client = chromadb.PersistentClient(path=VECTORDB_DIR)
@@ -109,9 +609,30 @@ class QueryEngine:
         
         print("  [OK] Query engine ready\n")
     
+    @property
+    def last_chunk_count(self) -> Optional[int]:
+        """Chunks sent to the LLM by the last query on the calling thread (None if none yet)."""
+        return getattr(self._thread_state, 'last_chunk_count', None)
+    
+    @last_chunk_count.setter
+    def last_chunk_count(self, value: Optional[int]):
+        self._thread_state.last_chunk_count = value
+    
+    @property
+    def last_answer_is_fallback(self) -> bool:
+        """True if the last query on the calling thread returned a fallback message instead of an answer."""
+        return getattr(self._thread_state, 'last_answer_is_fallback', False)
+    
+    def _fallback_answer(self, message: str) -> str:
+        """Mark the current query as having no real answer (no results, timeout, LLM failure) and return message."""
+        self._thread_state.last_answer_is_fallback = True
+        return message
+    
     def _load_indices(self):
         """Load pre-built term indices from disk."""
         print("  Loading indices...")
+        self._term_automaton = None  # rebuilt lazily from term_to_chunks
+        self._term_to_chunk_count = {}  # term -> number of chunk ids, for related-question scoring
         
         if not os.path.exists(INDICES_FILE):
             print(f"    [!] Indices not found: {INDICES_FILE}")
@@ -124,13 +645,14 @@ class QueryEngine:
             return
         
         try:
-            with open(INDICES_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read_indices_file()
             
             self.term_to_chunks = data.get('term_to_chunks', {})
             self.term_index = data.get('term_index', {})
             self.entity_associations = data.get('entity_associations', {})
             
+            self._term_to_chunk_count = {term: len(ids) for term, ids in self.term_to_chunks.items()}
+            
             version = data.get('version', 'unknown')
             print(f"    [OK] Loaded indices (version {version})")
             print(f"      - {len(self.term_to_chunks):,} indexed terms")
@@ -143,9 +665,36 @@ class QueryEngine:
         # Load endnotes for sparse result augmentation
         self._load_endnotes()
     
+    def _read_indices_file(self) -> dict:
+        """
+        Parse INDICES_FILE, using the pickled copy in CACHE_DIR when it was written
+        for the same indices.json mtime; otherwise parse the JSON and refresh the pickle.
+        """
+        mtime = os.path.getmtime(INDICES_FILE)
+        if os.path.exists(INDICES_PICKLE_FILE):
+            try:
+                with open(INDICES_PICKLE_FILE, 'rb') as f:
+                    cached = pickle.load(f)
+                if cached.get('mtime') == mtime:
+                    print("    [CACHE] Using pickled indices")
+                    return cached['data']
+            except Exception as e:
+                print(f"    [WARNING] Ignoring unreadable indices cache: {e}")
+        
+        with open(INDICES_FILE, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(INDICES_PICKLE_FILE, 'wb') as f:
+                pickle.dump({'mtime': mtime, 'data': data}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"    [WARNING] Could not write indices cache: {e}")
+        return data
+    
     def _load_endnotes(self):
         """Load endnotes for augmenting sparse results."""
-        from .config import DATA_DIR
         
         endnotes_file = os.path.join(DATA_DIR, 'endnotes.json')
         chunk_mapping_file = os.path.join(DATA_DIR, 'chunk_to_endnotes.json')
@@ -240,20 +789,19 @@ class QueryEngine:
     
     def query(self, question: str, max_chunks: int = DEFAULT_TOP_K, use_llm: bool = True) -> str:
         """Main query entry point with logging."""
-        import time
-        from lib.config import QUERY_TIMEOUT_SECONDS
         query_start = time.time()
+        self._thread_state.last_answer_is_fallback = False
         # CRITICAL: Always get fresh collection reference to avoid ChromaDB stale UUID caching
         try:
             print(f"  [QUERY_START] Processing: '{question[:60]}...'")
             # Force fresh collection reference - ChromaDB caches UUIDs internally
-            self.collection = self.chroma_client.get_collection(name=COLLECTION_NAME)
-            current_coll_id = self.collection.id
-            current_count = self.collection.count()
+            # Held locally: the engine is shared by queries running on other threads
+            collection = self.chroma_client.get_collection(name=COLLECTION_NAME)
+            current_coll_id = collection.id
+            current_count = collection.count()
             print(f"  [QUERY_START] Fresh Collection ID: {current_coll_id}, Chunks: {current_count}")
         except Exception as e:
             print(f"  [FATAL] Cannot get collection at query start: {e}")
-            import traceback
             traceback.print_exc()
             raise
         """
@@ -620,18 +1168,18 @@ class QueryEngine:
                 # First, determine the time span of currently retrieved chunks
                 # Verify collection before accessing
                 try:
-                    _ = self.collection.id  # Force validation
+                    _ = collection.id  # Force validation
                 except Exception:
-                    self.collection = self.chroma_client.get_collection(name=COLLECTION_NAME)
-                current_chunk_data = self.collection.get(ids=list(chunk_ids)[:100])  # Sample to find time span
-                current_years = set()
+                    collection = self.chroma_client.get_collection(name=COLLECTION_NAME)
+                current_chunk_data = collection.get(ids=list(chunk_ids)[:100])  # Sample to find time span
+                # Years are fixed-width 4-digit strings, so the string max is the numeric max
+                current_latest = 0
                 for text in current_chunk_data['documents']:
-                    matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+                    matches = _YEAR_RE.findall(text)
                     if matches:
-                        current_years.update(int(m) for m in matches)
+                        current_latest = max(current_latest, int(max(matches)))
                 
-                if current_years:
-                    current_latest = max(current_years)
+                if current_latest:
                     # Get union of all subject terms (chunks mentioning any subject term)
                     subject_union = set()
                     for term in subject_terms:
@@ -648,12 +1196,12 @@ class QueryEngine:
                             batch_size = CHUNK_RETRIEVAL_BATCH_SIZE
                             for i in range(0, len(candidate_ids), batch_size):
                                 batch_ids = candidate_ids[i:i+batch_size]
-                                batch_data = self.collection.get(ids=batch_ids)
+                                batch_data = collection.get(ids=batch_ids)
                                 for chunk_id, text, meta in zip(batch_data['ids'], batch_data['documents'], batch_data['metadatas']):
                                     # Check if chunk has years later than what we already have
-                                    matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+                                    matches = _YEAR_RE.findall(text)
                                     if matches:
-                                        latest_year = max(int(m) for m in matches)
+                                        latest_year = int(max(matches))
                                         # Only add if it's from a later period than what we already retrieved
                                         if latest_year > current_latest:
                                             later_period_ids.add(chunk_id)
@@ -692,19 +1240,19 @@ class QueryEngine:
                 pass
 
         if not chunk_ids:
-            return "No relevant information found."
+            return self._fallback_answer("No relevant information found.")
         
         # Fetch chunks - deduplicated by set(), but get them all
         chunk_ids_list = list(chunk_ids)
         # Verify collection is still valid before accessing
         try:
-            current_id = self.collection.id
+            current_id = collection.id
             print(f"    [FETCH] Collection ID before get(): {current_id}")
         except Exception as e:
             print(f"    [ERROR] Collection invalid, reconnecting: {e}")
-            self.collection = self.chroma_client.get_collection(name=COLLECTION_NAME)
-            print(f"    [RECONNECT] New collection ID: {self.collection.id}")
-        data = self.collection.get(ids=chunk_ids_list)
+            collection = self.chroma_client.get_collection(name=COLLECTION_NAME)
+            print(f"    [RECONNECT] New collection ID: {collection.id}")
+        data = collection.get(ids=chunk_ids_list)
         
         print(f"  [INFO] Found {len(chunk_ids_list)} relevant chunks")
         
@@ -743,7 +1291,7 @@ class QueryEngine:
                 for text, meta in zip(data['documents'], data['metadatas'])
             ]
             # Ideology tightening: for Marxism/Socialism/Communism/Collectivism, filter to finance-relevant chunks
-            if self._is_ideology_query(question):
+            if _is_ideology_query_cached(question):
                 chunks = self._filter_chunks_for_ideology(chunks, question)
             
             # For identity queries, filter to banking/finance-relevant chunks only
@@ -781,7 +1329,7 @@ class QueryEngine:
                 
                 filtered_chunks = []
                 for text, meta in chunks:
-                    text_lower = text.lower()
+                    text_lower = _text_lower((text, meta))
                     # Require strict finance keyword (chunks are already in identity index, so identity relevance is assumed)
                     has_finance = any(keyword in text_lower for keyword in strict_finance_keywords)
                     
@@ -851,9 +1399,9 @@ class QueryEngine:
             
             # Detect special query types
             # Note: is_control_influence already detected earlier (before augmentation)
-            is_market = self._is_market_query(question)
+            is_market = _is_market_query_cached(question)
             is_event = self._is_event_query(question)
-            is_ideology = self._is_ideology_query(question)
+            is_ideology = _is_ideology_query_cached(question)
             # Re-check control/influence if not already detected (shouldn't happen, but safety check)
             if 'is_control_influence' not in locals():
                 is_control_influence = self._is_control_influence_query(question)
@@ -876,7 +1424,7 @@ class QueryEngine:
                 # Debug: print years in original_chunks
                 chunk_years = set()
                 for text_chunk, _ in original_chunks:
-                    matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text_chunk)
+                    matches = _YEAR_RE.findall(text_chunk)
                     chunk_years.update(int(m) for m in matches)
                 needs = self._needs_grounding(text) or self._answer_stops_early(text, original_chunks) or self._paragraphs_exceed_limit(text)
                 if needs:
@@ -898,15 +1446,13 @@ class QueryEngine:
                 # So we just use the standard build_prompt - no need to duplicate guidance here
                 from lib.prompts import build_prompt
                 prompt = build_prompt(question, chunks, is_control_influence=True)
-                import time
                 start_time = time.time()
                 
-                # Temporarily reduce retries for control queries (prevents long waits)
+                # Reduce retries for control queries (prevents long waits)
                 # With rate limits, even reduced retries can take time, but better than default 20
-                self.llm._temp_max_attempts = CONTROL_INFLUENCE_MAX_RETRIES
-                
+                # Passed per call: the LLM client is shared by queries running on other threads
                 try:
-                    answer = self.llm.call_api(prompt)
+                    answer = self.llm.call_api(prompt, max_attempts=CONTROL_INFLUENCE_MAX_RETRIES)
                     elapsed = time.time() - start_time
                     print(f"  [CONTROL] LLM call completed in {elapsed:.1f}s")
                     if elapsed > CONTROL_INFLUENCE_SLOW_THRESHOLD_SECONDS:
@@ -916,12 +1462,8 @@ class QueryEngine:
                     elapsed = time.time() - start_time
                     print(f"  [ERROR] LLM call failed after {elapsed:.1f}s: {e}")
                     if elapsed > 180:  # 3 minutes
-                        return f"⚠️ Query timed out after {elapsed:.0f} seconds. The query '{question}' is very broad. Please try a more specific question:\n\n- 'Which specific Jewish families dominated banking in 19th century London?'\n- 'How did Quakers compare to Jews in banking during the 1800s?'\n- 'What role did Rothschild family play in European banking?'"
+                        return self._fallback_answer(f"⚠️ Query timed out after {elapsed:.0f} seconds. The query '{question}' is very broad. Please try a more specific question:\n\n- 'Which specific Jewish families dominated banking in 19th century London?'\n- 'How did Quakers compare to Jews in banking during the 1800s?'\n- 'What role did Rothschild family play in European banking?'")
                     raise
-                finally:
-                    # Restore original max_attempts
-                    if hasattr(self.llm, '_temp_max_attempts'):
-                        delattr(self.llm, '_temp_max_attempts')
             if is_ideology:
                 print(f"  [AUTO] Ideology topic detected ({len(chunks)} chunks)")
                 # Route to IdeologyEngine with safe fallback
@@ -942,7 +1484,7 @@ class QueryEngine:
                 # Debug: print years in original_chunks
                 chunk_years = set()
                 for text_chunk, _ in original_chunks:
-                    matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text_chunk)
+                    matches = _YEAR_RE.findall(text_chunk)
                     chunk_years.update(int(m) for m in matches)
                 needs = self._needs_grounding(answer) or self._answer_stops_early(answer, original_chunks) or self._paragraphs_exceed_limit(answer)
                 if needs:
@@ -960,7 +1502,7 @@ class QueryEngine:
                         print(f"  [RETRY] Retrying with {len(reduced_chunks)} chunks (reduced from {len(original_chunks)})")
                         answer = self._call_llm_with_rate_limit(question, reduced_chunks)
                     else:
-                        return f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts."
+                        return self._fallback_answer(f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts.")
                 # Ensure Related Questions and structure
                 if (not self._has_related_questions(answer)) or self._para_count(answer) < 3:
                     answer = self._polish_answer(question, answer)
@@ -1003,7 +1545,7 @@ class QueryEngine:
                         answer = self.llm.generate_answer(question, reduced_chunks)
                     else:
                         # Even with few chunks, empty answer - return error message
-                        return f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts."
+                        return self._fallback_answer(f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts.")
                 
                 # Ensure structure & related questions
                 if (not self._has_related_questions(answer)) or self._para_count(answer) < 3:
@@ -1038,7 +1580,7 @@ class QueryEngine:
                             print(f"  [RETRY] Retrying with {len(reduced_chunks)} chunks (reduced from {len(chunks)})")
                             ans = self._generate_geographic_narrative(question, reduced_chunks)
                         else:
-                            ans = f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts."
+                            ans = self._fallback_answer(f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts.")
                     try:
                         if self._chunks_have_crisis(chunks) and not self._has_crises(ans):
                             ans = ans.strip() + "\n\n" + "**Crisis Episodes (from sources):**\n- Include relevant panics/crises linked to this subject and explain liquidity/margin/benchmark changes.\n"
@@ -1048,7 +1590,7 @@ class QueryEngine:
                     # Debug: print years in original_chunks
                     chunk_years = set()
                     for text, _ in original_chunks:
-                        matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+                        matches = _YEAR_RE.findall(text)
                         chunk_years.update(int(m) for m in matches)
                     # Skip expensive re-ask logic for small/medium queries (≤20 chunks) to avoid timeout
                     if len(original_chunks) > 20:
@@ -1073,7 +1615,7 @@ class QueryEngine:
                                         union_chunk_ids = primary_chunk_ids
                                 
                                 if union_chunk_ids and len(union_chunk_ids) > len(original_chunks):
-                                    union_data = self.collection.get(ids=list(union_chunk_ids))
+                                    union_data = collection.get(ids=list(union_chunk_ids))
                                     union_chunks = [
                                         (text, meta)
                                         for text, meta in zip(union_data['documents'], union_data['metadatas'])
@@ -1127,7 +1669,7 @@ class QueryEngine:
                             print(f"  [RETRY] Retrying with {len(reduced_chunks)} chunks (reduced from {len(chunks)})")
                             ans = self._generate_iterative_narrative(question, reduced_chunks, subject_terms, subject_phrases)
                         else:
-                            ans = f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts."
+                            ans = self._fallback_answer(f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts.")
                     try:
                         if self._chunks_have_crisis(chunks) and not self._has_crises(ans):
                             ans = ans.strip() + "\n\n" + "**Crisis Episodes (from sources):**\n- Include relevant panics/crises linked to this subject and explain liquidity/margin/benchmark changes.\n"
@@ -1136,7 +1678,7 @@ class QueryEngine:
                     # Debug: print years in original_chunks
                     chunk_years = set()
                     for text, _ in original_chunks:
-                        matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+                        matches = _YEAR_RE.findall(text)
                         chunk_years.update(int(m) for m in matches)
                     needs = self._needs_grounding(ans) or self._answer_stops_early(ans, original_chunks) or self._paragraphs_exceed_limit(ans)
                     if needs:
@@ -1159,7 +1701,7 @@ class QueryEngine:
                                     union_chunk_ids = primary_chunk_ids
                             
                             if union_chunk_ids and len(union_chunk_ids) > len(original_chunks):
-                                union_data = self.collection.get(ids=list(union_chunk_ids))
+                                union_data = collection.get(ids=list(union_chunk_ids))
                                 union_chunks = [
                                     (text, meta)
                                     for text, meta in zip(union_data['documents'], union_data['metadatas'])
@@ -1211,7 +1753,6 @@ class QueryEngine:
                     # Log to trace for debugging
                     try:
                         from server import trace_event
-                        import uuid
                         trace_event(str(uuid.uuid4()), "routing_decision", path="fast_path", chunk_count=len(chunks), original_count=len(original_chunks) if 'original_chunks' in locals() else 0)
                     except:
                         pass  # Trace optional
@@ -1234,7 +1775,6 @@ class QueryEngine:
                 # Log to trace for debugging
                 try:
                     from server import trace_event
-                    import uuid
                     trace_event(str(uuid.uuid4()), "routing_decision", path="period_engine", chunk_count=len(chunks), original_count=len(original_chunks) if 'original_chunks' in locals() else 0, warning="SLOW_PATH")
                 except:
                     pass  # Trace optional
@@ -1258,7 +1798,7 @@ class QueryEngine:
                     # Debug: print years in original_chunks
                     chunk_years = set()
                     for text_chunk, _ in original_chunks:
-                        matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text_chunk)
+                        matches = _YEAR_RE.findall(text_chunk)
                         chunk_years.update(int(m) for m in matches)
                     needs = self._needs_grounding(ans) or self._answer_stops_early(ans, original_chunks) or self._paragraphs_exceed_limit(ans)
                     if needs:
@@ -1299,7 +1839,7 @@ class QueryEngine:
         ]
         
         # Specific year mentioned
-        has_year = bool(re.search(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', question_lower))
+        has_year = bool(_YEAR_RE.search(question_lower))
         
         # Check for event keywords
         has_event_keyword = any(keyword in question_lower for keyword in event_keywords)
@@ -1335,188 +1875,53 @@ class QueryEngine:
         Detect whether the question is focused on markets/assets.
         These queries benefit from geographic/sector batching instead of pure chronology.
         """
-        market_keywords = [
-            'money market', 'money-market', 'capital market', 'bond market', 'commercial paper', 'commercial-paper',
-            'abcp', 'mmeu', 'mmea', 'eurodollar', 'euro-dollar', 'euro dollar', 'eurodollar market', 'euro-market', 'euro market',
-            'libor', 'eurobond', 'railroad securities', 'reit', 'real estate trust', 'real-estate trust',
-            'conglomerate stock', 'technology stock', 'tech stock',
-            'slave market', 'diversity finance', 'dei investments',
-            'long-term capital', 'asset-backed', 'asset backed', 'junk bond', 'high-yield', 'high yield',
-            'venture capital', 'lbo', 'leveraged buyout', 'money fund', 'money-fund', 'money market mutual fund',
-            'trade bills', 'bills payable', 'foreign trade bills', 'legal tender notes', 'legal-tender notes',
-            'bank holding company act', 'holding company', 'market mutual fund'
-        ]
-        question_lower = question.lower()
-        return any(keyword in question_lower for keyword in market_keywords)
+        return _is_market_query_cached(question)
     
     # Note: acronym/full-name normalization is handled in the index; no query-time expansion here.
     
     def _generate_geographic_narrative(self, question: str, chunks: list, for_market: bool = False) -> str:
         """
-        Generate narrative for event queries, organized by geography/sector.
-        """
-        from lib.batch_processor_geographic import GeographicProcessor
-        
-        processor = GeographicProcessor(self.llm, use_async=self.use_async)
-        prompt_builder = (lambda q, c, ctx: self._build_prompt_market(q, c)) if for_market else (lambda q, c, ctx: self._build_prompt(q, c))
-        return processor.process_by_geography(
-            question=question,
-            chunks=chunks,
-            prompt_builder=prompt_builder
-        )
-    
-    def _build_prompt_control_influence(self, question: str, chunks: list) -> str:
-        """
-        Build prompt for control/influence questions (e.g., "do jews control banking").
-        Applies special guidance from .cursorrules about analyzing narrowly, providing context, etc.
-        """
-        chunks_text = "\n\n".join([
-            f"--- CHUNK {i+1} ---\n{text}"
-            for i, (text, meta) in enumerate(chunks)
-        ])
-        return f"""You are a banking historian. Answer this question: {question}
-
-DOCUMENT CHUNKS:
-{chunks_text}
-
-CRITICAL GUIDANCE FOR CONTROL/INFLUENCE QUESTIONS:
-
-ABSOLUTE REQUIREMENT: Your answer MUST follow this EXACT structure. Do NOT deviate.
-
-MANDATORY STRUCTURE - FOLLOW THIS EXACT ORDER (DO NOT SKIP STEPS):
-
-1. PREMISE REJECTION (MANDATORY FIRST STEP - YOUR ANSWER MUST START HERE):
-   - YOUR FIRST SENTENCE MUST explicitly reject the premise as unsupported and consistent with conspiratorial or reductionist thinking
-   - State clearly that no group uniformly controls complex economic systems
-   - NEVER mention "documents", "the provided documents", "as depicted in these documents", "the documents indicate", "historical documents", "historical records", "historical evidence", "records show", or any source material
-   - BAD: "While specific Jewish families made significant contributions..." (starts with examples, not rejection)
-   - BAD: "The assertion that Jews control banking is addressed..."
-   - BAD: "The provided documents explicitly state..."
-   - GOOD: "The premise that any single ethnic, religious, or social group controls banking is unsupported and reflects conspiratorial thinking. No group uniformly controls complex economic systems."
-   - CRITICAL: If you do not start with premise rejection, your answer is WRONG
-
-2. CONTEXTUALIZATION AND LIMITS:
-   - Explain that any historical examples reflect participation by specific individuals or elite families under contextual constraints, not group-wide authority
-   - Emphasize selection bias in citing only prominent cases (what gets remembered vs. what gets forgotten)
-   - Clarify that participation was constrained, not dominant
-
-3. EVIDENCE/EXAMPLES FRAMED AS PARTICIPATION UNDER CONSTRAINT:
-   - Present evidence ONLY as examples of LIMITED participation by specific actors operating under constraints
-   - Which SPECIFIC families? (e.g., "Rothschild, Warburg, and Kuhn Loeb families" NOT "all Jews")
-   - What SPECIFIC time period? (e.g., "in 19th century Frankfurt" NOT "throughout history")
-   - What SPECIFIC place? (e.g., "in London" NOT "globally")
-   - Banking dominated by COUSINHOODS (small intermarried elite families), NOT entire populations
-   - Highlight that activities occurred under legal/social pressure (threats of expulsion/exclusion) rather than voluntary dominance
-   - Note government-imposed restrictions that pushed populations into specific economic roles
-   - Do NOT describe historical networks or family ties as coordinated group strategies unless explicitly evidenced
-   - Never infer collective will - frame as individual/family actions under constraints
-
-4. COUNTEREXAMPLES AND VULNERABILITY (MANDATORY):
-   - MANDATORY: Include counterexamples involving non-members of the group:
-     * Quakers (Barclay, Lloyd, Bevan), Huguenots (Hope, Mallet, Thellusson), Parsees (Tata, Wadia, Petit), Mennonites (Clercq, Fock, TenCate), Boston Brahmins (Cabot, Lowell, Forbes), Protestant Cologne (Stein, Schaaffhausen), Greeks, Armenians, etc.
-   - MANDATORY: Include instances of failure, vulnerability, or suppression:
-     * Financial defaults (e.g., Oppenheim collapse)
-     * Assassinations, executions, political persecution
-     * Expulsions and social exclusion
-   - MANDATORY: Include GOVERNMENT-IMPOSED RESTRICTIONS that pushed individuals into specific economic roles:
-     * Legal restrictions (e.g., restrictions on Jews in Frankfurt, prohibitions on land ownership, guild exclusions)
-     * Exclusion from other economic realms (politics, land ownership, certain trades/industries)
-     * Religious prohibitions on credit/usury that affected other groups (e.g., Christian prohibitions on lending at interest)
-     * These restrictions channeled certain populations into finance, not voluntary choice
-   - MANDATORY: Include THREATS TO COMMUNITIES:
-     * Threats of expulsion (actual expulsions or threats thereof)
-     * Social exclusion and discrimination
-     * Political interference and persecution
-   - MANDATORY: Include OTHER COMPETITORS AND GROUPS:
-     * Other identity groups (Quakers, Huguenots, Parsees, Mennonites, Boston Brahmins, Protestant Cologne, Greeks, Armenians, etc.)
-     * Religious prohibitions on credit/usury that affected other groups (e.g., Christian prohibitions on lending at interest that created opportunities for certain groups)
-     * Show that banking involved many groups, not just the queried group
-   - Show that participation was precarious and subject to sudden reversals
-   - Include examples of individuals/families who faced persecution, expulsion, or financial ruin
-   - CRITICAL: If chunks mention restrictions (e.g., Frankfurt restrictions), exclusion from politics/land/other realms, threats of expulsion, religious prohibitions on credit, or other competitors, you MUST include them - these are essential context
-
-5. CONCLUSION REAFFIRMING LACK OF COLLECTIVE CONTROL:
-   - Reaffirm that no group uniformly controls banking
-   - Emphasize that participation was limited, constrained, and occurred alongside many other groups
-   - Frame the pattern as one of small intermarried elite families across many groups, not unique to any single group
-
-6. IF NO EVIDENCE FOR THE CLAIM:
-   - State explicitly: "The document does not provide support for this claim."
-   - Do NOT infer beyond the text
-
-MAINTAIN NEUTRAL, EVIDENCE-BASED TONE:
-- Provide historical context without moralizing language or ideological assumptions
-- Use a factual style
-- Limit generalizations, avoid proxy language, and do not speculate beyond provided sources
-
-FINAL CHECKLIST BEFORE SUBMITTING:
-- [ ] Does your answer START with premise rejection? If NO → REWRITE
-- [ ] Did you mention "documents", "provided documents", "as depicted in", "the documents indicate", or any source material? If YES → DELETE and rewrite
-- [ ] Did you follow the exact order: (1) Premise rejection → (2) Contextualization → (3) Evidence → (4) Counterexamples → (5) Conclusion? If NO → REORGANIZE
-- [ ] Did you include counterexamples from other groups? If NO → ADD THEM
-- [ ] Did you include failures/vulnerabilities? If NO → ADD THEM
-
-7. CHRONOLOGICAL ORGANIZATION: Cover all time periods documents mention, moving forward chronologically.
-
-8. END WITH RELATED QUESTIONS: 3-5 questions about specific families, institutions, or time periods mentioned in documents.
-
-Answer:
-"""
+        Generate narrative for event queries, organized by geography/sector.
+        """
+        from lib.batch_processor_geographic import GeographicProcessor
+        
+        processor = GeographicProcessor(self.llm, use_async=self.use_async)
+        prompt_builder = (lambda q, c, ctx: self._build_prompt_market(q, c)) if for_market else (lambda q, c, ctx: self._build_prompt(q, c))
+        return processor.process_by_geography(
+            question=question,
+            chunks=chunks,
+            prompt_builder=prompt_builder
+        )
+    
+    def _build_prompt_control_influence(self, question: str, chunks: list) -> str:
+        """
+        Build prompt for control/influence questions (e.g., "do jews control banking").
+        Applies special guidance from .cursorrules about analyzing narrowly, providing context, etc.
+        """
+        chunks_text = _render_chunks(chunks)
+        return "".join((_CTRL_PREFIX, question, _CTRL_MIDDLE, chunks_text, _CTRL_SUFFIX))
     
     def _build_prompt_market(self, question: str, chunks: list) -> str:
         """
         Build prompt for Markets & Asset Classes queries with explicit panic/crisis coverage.
         """
-        chunks_text = "\n\n".join([
-            f"--- CHUNK {i+1} ---\n{text}"
-            for i, (text, meta) in enumerate(chunks)
-        ])
-        return f"""You are a banking historian. Answer this question: {question}
-
-DOCUMENT CHUNKS:
-{chunks_text}
-
-MARKET/ASSET CLASS RULES:
-1) STRUCTURE:
-   - Use section headings (e.g., "**Origins & Stimulation Factors:**", "**Funding & Participants:**", "**Pricing & Benchmarks:**", "**Regulation & Balance Sheets:**", "**Panics & Crises:**").
-   - 2–4 paragraphs per section; MAX 3 sentences per paragraph; MIN 5 paragraphs total.
-   - Within sections, PRESENT FACTS IN STRICT CHRONOLOGICAL ORDER (e.g., 1950s → 1960s → 1970s → 1980s → 1990s → 2000s).
-2) STIMULATION FACTORS (MANDATORY - MUST INCLUDE):
-   - ALWAYS include an "Origins & Stimulation Factors" section or integrate stimulation factors into the opening
-   - Explain WHAT CREATED/DROVE the market: laws (e.g., National Bank Act, Banking Act of 1933), innovations (e.g., silicon transistors, venture capital), economic conditions (e.g., post-war growth, deregulation), wars (e.g., WWII, Cold War), panics (e.g., Panic of 1907 led to Federal Reserve Act), regulatory changes (e.g., SEC creation, Glass-Steagall repeal)
-   - BAD: "The technology equities sector emerged significantly in the mid-20th century" (no explanation of WHY or WHAT drove it)
-   - GOOD: "The technology equities sector emerged in the mid-20th century, driven by Cold War defense spending on semiconductors, the rise of venture capital funding structures, and innovations in silicon transistor technology that enabled commercial applications."
-   - MANDATORY: Search chunks for laws, innovations, economic conditions, wars, panics, regulatory changes that stimulated the market's creation/growth
-3) PANICS/CRISES (MANDATORY WHEN PRESENT IN SOURCES):
-   - Explicitly cover relevant panics/crises linked to the subject (e.g., 1763, 1825, 1873, 1893, 1907, 1929, 1973–74, 1987, 1998, 2000 dot-com crash, 2008 financial crisis).
-   - Explain how liquidity, margining, benchmarks, or dealer balance sheets changed in this market during those episodes.
-   - MANDATORY: If documents mention panics/crises during periods when the market was active, you MUST include them - don't skip panics
-   - BAD: Answer about technology equities mentions 1950s-2000s but no mention of dot-com crash (2000) or 2008 financial crisis if documents mention them
-   - GOOD: "During the dot-com crash of 2000, technology equities [specific impacts from docs]. Following the 2008 financial crisis, technology equities [specific impacts from docs]."
-4) SUBJECT ACTIVE:
-   - Keep the market/asset as the active subject in each sentence.
-5) MECHANICS:
-   - Institutions italicized (e.g., *MMEU*, *FRS*, *NYSE*); people normal.
-   - Strict relevance; no unrelated context.
-6) COVERAGE:
-   - Move forward in time across all eras present; short transitions to connect periods.
-7) END:
-   - "Related Questions:" with 3–5 substantial, document-grounded items.
-"""
+        chunks_text = _render_chunks(chunks)
+        return "".join((_MARKET_PREFIX, question, _MARKET_MIDDLE, chunks_text, _MARKET_SUFFIX))
     
     def _sort_chunks_by_year(self, chunks: list) -> list:
         """Sort chunk tuples by the first year mentioned; unknown years go last, stable otherwise."""
-        def first_year(text: str) -> int:
-            m = re.search(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
-            return int(m.group(1)) if m else 10**9
-        return sorted(chunks, key=lambda t: first_year(t[0]))
+        keys = []
+        for text, _ in chunks:
+            m = _YEAR_RE.search(text)
+            keys.append(int(m.group(1)) if m else 10**9)
+        return [chunk for _, chunk in sorted(zip(keys, chunks), key=itemgetter(0))]
     
     def _stratify_by_decade(self, chunks: list, cap_per_decade: int = 5, max_total: int = 60) -> list:
         """Sample up to cap_per_decade chunks per decade to reduce sprawl; preserve order."""
         buckets = {}
         ordered = []
         for text, meta in chunks:
-            m = re.search(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+            m = _YEAR_RE.search(text)
             year = int(m.group(1)) if m else None
             decade = (year // 10 * 10) if year else None
             key = decade if decade is not None else 'unknown'
@@ -1530,37 +1935,19 @@ MARKET/ASSET CLASS RULES:
         return ordered if ordered else chunks
     
     def _is_ideology_query(self, question: str) -> bool:
-        q = (question or "").lower()
-        return any(k in q for k in ("marxism", "marxist", "socialism", "socialist", "communism", "communist", "collectivism", "collectivist"))
+        return _is_ideology_query_cached(question or "")
     
     def _filter_chunks_for_ideology(self, chunks: list, question: str) -> list:
         """Keep chunks that mention the ideology AND (banking/transition OR crisis); prefer identity-bearing chunks."""
-        ideology_terms = ["marxism", "marxist", "socialism", "socialist", "communism", "communist", "collectivism", "collectivist"]
-        finance_terms = [
-            "bank", "banking", "credit", "money", "market", "securities", "bond", "equity",
-            "stock", "capital", "liquidity", "exchange", "regulation", "balance sheet",
-            "benchmark", "margin"
-        ]
-        transition_terms = [
-            "nationalize", "nationalised", "nationalized", "collectivize", "collectivised", "collectivized",
-            "expropriate", "expropriation", "confiscate", "decree", "five-year plan", "plan economy",
-            "state bank", "central plan", "command economy", "price control", "currency reform"
-        ]
-        crisis_terms = ["panic", "panics", "crisis", "crises", "1763", "1825", "1873", "1893", "1907", "1929", "1973", "1974", "1987", "1998", "2008"]
-        identity_terms = [
-            "minority", "women", "widow", "gender", "race", "caste", "dalit", "brahmin",
-            "jew", "jewish", "quaker", "huguenot", "armenian", "greek", "boston brahmin",
-            "old believer", "parsee", "baniya", "sephardi", "ashkenazi", "court jew"
-        ]
         kept_primary = []
         kept_with_identity = []
         for text, meta in chunks:
-            tl = text.lower()
-            has_ideology = any(t in tl for t in ideology_terms)
-            has_finance = any(f in tl for f in finance_terms)
-            has_transition = any(t in tl for t in transition_terms)
-            has_crisis = any(c in tl for c in crisis_terms)
-            has_identity = any(i in tl for i in identity_terms)
+            tl = _text_lower((text, meta))
+            has_ideology = any(t in tl for t in _IDEOLOGY_TERMS)
+            has_finance = any(f in tl for f in _IDEOLOGY_FINANCE_TERMS)
+            has_transition = any(t in tl for t in _IDEOLOGY_TRANSITION_TERMS)
+            has_crisis = any(c in tl for c in _IDEOLOGY_CRISIS_TERMS)
+            has_identity = any(i in tl for i in _IDEOLOGY_IDENTITY_TERMS)
             if has_ideology and (has_finance or has_transition or has_crisis):
                 kept_primary.append((text, meta))
                 if has_identity:
@@ -1573,33 +1960,8 @@ MARKET/ASSET CLASS RULES:
     
     def _build_prompt_ideology(self, question: str, chunks: list) -> str:
         """Prompt that constrains ideology topics to finance/banking mechanics, panics, and identity effects."""
-        chunks_text = "\n\n".join([
-            f"--- CHUNK {i+1} ---\n{text}"
-            for i, (text, meta) in enumerate(chunks)
-        ])
-        return f"""You are a banking historian. Answer this question through an IDEOLOGY → SOCIETY & FINANCE lens: {question}
-
-DOCUMENT CHUNKS:
-{chunks_text}
-
-IDEOLOGY → FINANCE RULES:
-1) SUBJECT ACTIVE (ALWAYS): Keep the ideology as the subject in every sentence (e.g., "Marxism shaped bank nationalization...").
-2) SOCIETY & STATE (MANDATORY): Focus on nationalization/collectivization mechanics, property rights, redistribution, repression or protections, and how the state reallocated economic control.
-3) PANICS/CRISES (MANDATORY WHEN PRESENT): If sources mention panics/crises (1763, 1825, 1873, 1893, 1907, 1929, 1973–74, 1987, 1998, 2008), explain social effects: employment, credit access, expropriations, migration, class/caste conflict, and changes to who could access finance.
-4) IDENTITY (MANDATORY WHEN PRESENT): Explain effects on minorities and identity groups documented in the sources (e.g., exclusions or access for Jews, Quakers, Dalits, women/widows), and how those shaped roles (minority middlemen).
-5) STRICT RELEVANCE: Avoid unrelated event/name “laundry lists.” Do NOT jump across unrelated locales. Do NOT introduce new people unless the documents show a direct tie to the subject; when a person is named, state in 1 short clause why they matter to this ideology’s effect on banking/society.
-6) FINANCIAL MECHANICS (WHEN PRESENT): Banking structure, credit allocation, benchmarks, dealer/state balance sheets—only as they inform social outcomes.
-7) CHRONOLOGY WITH TRANSITIONS: Move forward in time (e.g., 1910s → 1930s → 1950s). Use explicit transitions that explain how one period leads to the next. Do not mix decades in the same paragraph.
-8) PARAGRAPHS: MAX 3 sentences per paragraph; MIN 5 paragraphs total.
-9) MECHANICS: Institutions italicized (e.g., *FRS*, *NYSE*, *Banque de France*); people normal. No platitudes.
-10) END: "Related Questions:" with 3–5 substantial, document-grounded items.
-
-ENTITY INTRODUCTIONS (MANDATORY):
-- Expand acronyms/institutions on first mention with role (e.g., "*Vneshtorg* (Soviet Bank for Foreign Trade)").
-- For each person first mentioned, add role + relevance to SUBJECT in one short clause; otherwise omit the name.
-- Do NOT use unknown acronyms (e.g., BSU) unless you define them from the provided chunks; if the chunks do not define, avoid using them.
-- For any non-subject entity mentioned (person or institution), explicitly state in the same sentence how they relate to the SUBJECT.
-"""
+        chunks_text = _render_chunks(chunks)
+        return "".join((_IDEOLOGY_PREFIX, question, _IDEOLOGY_MIDDLE, chunks_text, _IDEOLOGY_SUFFIX))
     
     def _has_market_crises(self, text: str) -> bool:
         """Heuristic: does the text mention 'panic' or canonical crisis years."""
@@ -1608,79 +1970,77 @@ ENTITY INTRODUCTIONS (MANDATORY):
         tl = text.lower()
         if "panic" in tl or "crisis" in tl or "crises" in tl:
             return True
-        for yr in ("1973", "1974", "1987", "1998", "2008", "1929", "1907", "1825", "1873"):
+        for yr in _CRISIS_YEAR_SET:
             if yr in tl:
                 return True
         return False
     
     def _paragraphs_exceed_limit(self, text: str, max_sentences: int = MAX_SENTENCES_PER_PARAGRAPH) -> bool:
         """Return True if any paragraph exceeds the allowed sentence count."""
-        try:
-            paras = [p for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
-            for p in paras:
-                # crude sentence split on . ! ?
-                sentences = re.split(r"[.!?](?:\s|$)", p.strip())
-                # account for trailing empty after split
-                count = sum(1 for s in sentences if s.strip())
-                if count > max_sentences:
-                    return True
-        except Exception:
-            return False
+        for p in _PARA_SPLIT_RE.split(text.strip()):
+            p = p.strip()
+            if not p:
+                continue
+            # crude sentence count on . ! ? - stop at the first paragraph over the limit
+            count = 0
+            start = 0
+            for m in _SENT_BOUND_RE.finditer(p):
+                if p[start:m.start()].strip():
+                    count += 1
+                    if count > max_sentences:
+                        return True
+                start = m.end()
+            # trailing text without terminal punctuation still counts as a sentence
+            if p[start:].strip() and count + 1 > max_sentences:
+                return True
         return False
     
+    def _chunk_year_span(self, chunks: list) -> Tuple[Optional[int], Optional[int]]:
+        """
+        (earliest, latest) year mentioned across all chunks, or (None, None).
+        Scans one joined string so the regex runs once instead of once per chunk;
+        the unit-separator joiner is a non-word char, so word boundaries are unchanged.
+        """
+        joined = "\x1f".join(text for text, _ in chunks)
+        if njit is not None:
+            mn, mx = _minmax_year_jit(np.frombuffer(joined.encode("utf-8"), dtype=np.uint8))
+            return (mn, mx) if mn else (None, None)
+        years = _YEAR_RE.findall(joined)
+        if not years:
+            return None, None
+        years = list(map(int, years))
+        return min(years), max(years)
+    
     def _chunks_have_late_era(self, chunks: list, cutoff_year: Optional[int] = None) -> bool:
         """
         Detect if sources include material significantly later than the earliest chunk.
         If cutoff_year is None, uses EARLY_STOP_GAP_THRESHOLD to determine what's "late".
         """
-        try:
-            # Find the earliest year in chunks
-            earliest_year = None
-            latest_year = None
-            for text, _ in chunks:
-                for m in re.finditer(r"\b(1[6-9]\d{2}|20[0-2]\d)\b", text):
-                    year = int(m.group(1))
-                    if earliest_year is None or year < earliest_year:
-                        earliest_year = year
-                    if latest_year is None or year > latest_year:
-                        latest_year = year
-            
-            if earliest_year is None or latest_year is None:
-                return False
-            
-            # If cutoff_year provided, use it; otherwise check if there's a significant gap
-            if cutoff_year is not None:
-                return latest_year >= cutoff_year
-            else:
-                # Check if latest is significantly later than earliest (more than threshold)
-                return (latest_year - earliest_year) > EARLY_STOP_GAP_THRESHOLD
-        except Exception:
-            pass
-        return False
+        # Find the earliest/latest year in chunks
+        earliest_year, latest_year = self._chunk_year_span(chunks)
+        
+        if earliest_year is None or latest_year is None:
+            return False
+        
+        # If cutoff_year provided, use it; otherwise check if there's a significant gap
+        if cutoff_year is not None:
+            return latest_year >= cutoff_year
+        else:
+            # Check if latest is significantly later than earliest (more than threshold)
+            return (latest_year - earliest_year) > EARLY_STOP_GAP_THRESHOLD
     
     def _get_latest_year_in_chunks(self, chunks: list) -> int:
         """Get the latest year mentioned in chunks."""
-        latest = 0
-        try:
-            for text, _ in chunks:
-                for m in re.finditer(r"\b(1[6-9]\d{2}|20[0-2]\d)\b", text):
-                    year = int(m.group(1))
-                    if year > latest:
-                        latest = year
-        except Exception:
-            pass
-        return latest
+        _, latest = self._chunk_year_span(chunks)
+        return latest or 0
     
     def _get_latest_year_in_answer(self, text: str) -> int:
         """Get the latest year mentioned in answer."""
         latest = 0
-        try:
-            for m in re.finditer(r"\b(1[6-9]\d{2}|20[0-2]\d)\b", text):
-                year = int(m.group(1))
-                if year > latest:
-                    latest = year
-        except Exception:
-            pass
+        for m in _YEAR_RE.finditer(text):
+            year = int(m.group(1))
+            if year > latest:
+                latest = year
         return latest
     
     def _answer_covers_late_era(self, text: str, chunks: Optional[List] = None, cutoff_year: Optional[int] = None) -> bool:
@@ -1688,35 +2048,27 @@ ENTITY INTRODUCTIONS (MANDATORY):
         Check if answer covers later periods present in chunks.
         If cutoff_year is None, compares answer years to chunk years dynamically.
         """
-        try:
-            answer_years = set()
-            for m in re.finditer(r"\b(1[6-9]\d{2}|20[0-2]\d)\b", text):
-                answer_years.add(int(m.group(1)))
-            
-            if not answer_years:
-                return False
-            
-            # If chunks provided, check if answer covers their time span
-            if chunks:
-                chunk_years = set()
-                for chunk_text, _ in chunks:
-                    for m in re.finditer(r"\b(1[6-9]\d{2}|20[0-2]\d)\b", chunk_text):
-                        chunk_years.add(int(m.group(1)))
-                
-                if chunk_years:
-                    chunk_latest = max(chunk_years)
-                    answer_latest = max(answer_years)
-                    # Answer covers late era if it's within threshold of chunk latest
-                    return (chunk_latest - answer_latest) <= EARLY_STOP_GAP_THRESHOLD
-            
-            # If cutoff_year provided, use it
-            if cutoff_year is not None:
-                return max(answer_years) >= cutoff_year
+        answer_years = set()
+        for m in _YEAR_RE.finditer(text):
+            answer_years.add(int(m.group(1)))
+        
+        if not answer_years:
+            return False
+        
+        # If chunks provided, check if answer covers their time span
+        if chunks:
+            _, chunk_latest = self._chunk_year_span(chunks)
             
-            return True  # If no chunks/cutoff, assume it covers
-        except Exception:
-            pass
-        return False
+            if chunk_latest is not None:
+                answer_latest = max(answer_years)
+                # Answer covers late era if it's within threshold of chunk latest
+                return (chunk_latest - answer_latest) <= EARLY_STOP_GAP_THRESHOLD
+        
+        # If cutoff_year provided, use it
+        if cutoff_year is not None:
+            return max(answer_years) >= cutoff_year
+        
+        return True  # If no chunks/cutoff, assume it covers
     
     def _answer_stops_early(self, text: str, chunks: list, gap_threshold: int = EARLY_STOP_GAP_THRESHOLD) -> bool:
         """Check if answer stops significantly earlier than chunks (gap of gap_threshold+ years)."""
@@ -1806,7 +2158,7 @@ ENTITY INTRODUCTIONS (MANDATORY):
             
             result = "\n\n".join(fixed).strip()
             return result or text
-        except Exception as e:
+        except (re.error, TypeError) as e:
             print(f"  [WARN] Paragraph enforcement failed: {e}")
             return text
     
@@ -1817,11 +2169,11 @@ ENTITY INTRODUCTIONS (MANDATORY):
     def _chunks_have_crisis(self, chunks: list) -> bool:
         """Check if any provided chunk text mentions panics/crises or canonical years."""
         try:
-            for text, _meta in chunks:
-                tl = text.lower()
+            for chunk in chunks:
+                tl = _text_lower(chunk)
                 if "panic" in tl or "crisis" in tl or "crises" in tl:
                     return True
-                for yr in ("1973", "1974", "1987", "1998", "2008", "1929", "1907", "1825", "1873"):
+                for yr in _CRISIS_YEAR_SET:
                     if yr in tl:
                         return True
         except Exception:
@@ -1830,32 +2182,21 @@ ENTITY INTRODUCTIONS (MANDATORY):
     
     def _needs_grounding(self, text: str) -> bool:
         """Decide if we should re-ask with a strictly grounded prompt."""
-        try:
-            if not isinstance(text, str):
-                return True
-            if "no relevant information found" in text.lower():
-                return True
-            # Too short or too few paragraphs
-            if len(text.strip()) < 300 or self._para_count(text) < 3:
-                return True
-        except Exception:
+        if not isinstance(text, str):
             return True
-        return False
+        return _needs_grounding_cached(text)
     
     def _build_prompt_grounded(self, question: str, chunks: list) -> str:
         """Ask the LLM to answer ONLY from the provided chunks, restating the topic and forbidding speculation."""
         # Extract all years present in chunks to understand the span (for context, not hardcoding)
         years_present = set()
         for text, _ in chunks:
-            matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+            matches = _YEAR_RE.findall(text)
             years_present.update(int(m) for m in matches)
         years_sorted = sorted(years_present) if years_present else []
         
         # Estimate token count to check if we're hitting limits
-        chunks_text = "\n\n".join([
-            f"--- CHUNK {i+1} ---\n{text}"
-            for i, (text, meta) in enumerate(chunks)
-        ])
+        chunks_text = _render_chunks(chunks)
         estimated_tokens = len(chunks_text.split()) * 1.3  # Rough estimate
         
         # If chunks are very large, sample strategically to stay within token limits
@@ -1867,7 +2208,7 @@ ENTITY INTRODUCTIONS (MANDATORY):
             for chunk in chunks:
                 text, meta = chunk
                 # Find latest year in chunk
-                matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+                matches = _YEAR_RE.findall(text)
                 if matches:
                     latest_year = max(int(m) for m in matches)
                     decade = (latest_year // 10) * 10
@@ -1887,28 +2228,20 @@ ENTITY INTRODUCTIONS (MANDATORY):
                 print(f"  [INFO] Sampled {len(chunks)} chunks down to {len(sampled_chunks)} (keeping all decades represented)")
                 chunks = sampled_chunks
                 # Rebuild chunks_text with sampled chunks
-                chunks_text = "\n\n".join([
-                    f"--- CHUNK {i+1} ---\n{text}"
-                    for i, (text, meta) in enumerate(chunks)
-                ])
+                chunks_text = _render_chunks(chunks)
         
-        return f"""Answer this question USING ONLY the information in the DOCUMENT CHUNKS. If the chunks do not contain an item, do not invent it.
-
-QUESTION:
-{question}
-
-DOCUMENT CHUNKS ({len(chunks)} chunks):
-{chunks_text}
-
-STRICT RULES:
-1) Use ONLY facts explicitly present in the chunks; do not speculate or add outside knowledge.
-2) Keep the SUBJECT active in every sentence; do not drift to unrelated entities.
-3) Expand acronyms on first use if the expansion appears in the chunks; otherwise avoid the acronym.
-4) Introduce people/entities with a one-clause role and relevance to the SUBJECT, but only if stated in the chunks.
-5) CHRONOLOGICAL COVERAGE (MANDATORY - CRITICAL): The chunks contain information spanning {f"{years_sorted[0]} to {years_sorted[-1]}" if len(years_sorted) >= 2 else "multiple time periods"}. You MUST cover ALL eras from {f"{years_sorted[0]}" if years_sorted else "earliest"} to {f"{years_sorted[-1]}" if years_sorted else "latest"}. Do NOT stop at an early period. Move forward chronologically: {f"{years_sorted[0]//10*10}s → " if years_sorted else ""}{f"{years_sorted[-1]//10*10}s" if years_sorted else "all periods"}. Do not skip any decades or centuries present in the chunks.
-6) Organize chronologically with short transitions; MAX 3 sentences per paragraph; MIN 5 paragraphs (or more if multiple eras are present - aim for 1-2 paragraphs per major era).
-7) End with "Related Questions:" based on entities/topics that appear in the chunks (only if answerable from them).
-"""
+        if len(years_sorted) >= 2:
+            span = f"{years_sorted[0]} to {years_sorted[-1]}"
+        else:
+            span = "multiple time periods"
+        first = f"{years_sorted[0]}" if years_sorted else "earliest"
+        last = f"{years_sorted[-1]}" if years_sorted else "latest"
+        arrow = f"{years_sorted[0]//10*10}s → {years_sorted[-1]//10*10}s" if years_sorted else "all periods"
+        return "".join((
+            _GROUNDED_PREFIX, question, _GROUNDED_CHUNKS_HEAD, str(len(chunks)), _GROUNDED_CHUNKS_TAIL, chunks_text,
+            _GROUNDED_RULES_HEAD, span, _GROUNDED_RULES_FIRST, first, _GROUNDED_RULES_LAST, last,
+            _GROUNDED_RULES_ARROW, arrow, _GROUNDED_RULES_TAIL,
+        ))
     
     def _generate_iterative_narrative(
         self,
@@ -1931,7 +2264,7 @@ STRICT RULES:
                     print(f"  [RETRY] Retrying with {len(reduced_chunks)} chunks (reduced from {len(chunks)})")
                     answer = self.llm.generate_answer(question, reduced_chunks)
                 else:
-                    return f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts."
+                    return self._fallback_answer(f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts.")
             # Ensure structure & related questions
             if (not self._has_related_questions(answer)) or self._para_count(answer) < 3:
                 answer = self._polish_answer(question, answer)
@@ -1948,12 +2281,13 @@ STRICT RULES:
         )
         
         if not preview_periods:
-            return "No relevant information found."
+            return self._fallback_answer("No relevant information found.")
         
         if len(preview_periods) <= 1:
-            filtered_chunks = list(chain.from_iterable(preview_periods.values()))
+            # Exactly one period here (empty was handled above); use its list as-is
+            filtered_chunks = next(iter(preview_periods.values()))
             if not filtered_chunks:
-                return "No relevant information found."
+                return self._fallback_answer("No relevant information found.")
             print("  [AUTO] Single-era subject detected; skipping century splitting.")
             # If institutional acronym present, stratify evidence across decades
             acronym_terms = [tok for tok in (subject_phrases or []) if tok.isupper()]
@@ -1971,7 +2305,7 @@ STRICT RULES:
                     print(f"  [RETRY] Retrying with {len(reduced_chunks)} chunks (reduced from {len(filtered_chunks)})")
                     answer = self.llm.generate_answer(question, reduced_chunks)
                 else:
-                    return f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts."
+                    return self._fallback_answer(f"I apologize, but I encountered an issue generating a response for '{question}'. The response may have exceeded token limits. Please try rephrasing your question or breaking it into smaller parts.")
             # Ensure structure & related questions
             if (not self._has_related_questions(answer)) or self._para_count(answer) < 3:
                 answer = self._polish_answer(question, answer)
@@ -2004,16 +2338,16 @@ STRICT RULES:
         - The expanded phrase 'Full Name YYYY' using YEAR_PREFIX_EXPANSIONS
         Note: Only 4-digit years are supported (e.g., TA1813, not TA13).
         """
+        matches = _LAW_TOKEN_RE.findall(question)
+        if not matches:
+            return []
         results = []
-        q_visible = question
-        matches = re.findall(r"\b(BHCA|BA|TA|SA|FA|IA|AA|PA|DA|CA|EA|LA)(\d{4})\b", q_visible, flags=re.IGNORECASE)
         seen = set()
         for prefix, year_token in matches:
             pref = prefix.upper()
             literal = f"{pref}{year_token}"
             if literal not in seen:
-                results.append(literal)
-                results.append(literal.lower())
+                results.extend((literal, literal.lower()))
                 seen.add(literal)
             full_base = YEAR_PREFIX_EXPANSIONS.get(pref)
             if not full_base:
@@ -2033,16 +2367,19 @@ STRICT RULES:
         tl = text.lower()
         if "related questions" in tl:
             return True
-        # Fallback: presence of 3+ question-mark lines near the end
-        tail = "\n".join(tl.splitlines()[-30:])
-        q_count = sum(1 for line in tail.splitlines() if "?" in line)
-        return q_count >= 3
+        # Fallback: presence of 3+ question marks in the last 30 lines
+        start = len(tl)
+        for _ in range(30):
+            start = tl.rfind("\n", 0, start)
+            if start < 0:
+                break
+        return tl.count("?", start + 1) >= 3
     
     def _para_count(self, text: str) -> int:
         """Count paragraphs by blank-line separation."""
         if not isinstance(text, str):
             return 0
-        paras = [p for p in re.split(r"\n\s*\n", text.strip()) if p.strip()]
+        paras = [p for p in _PARA_SPLIT_RE.split(text.strip()) if p.strip()]
         return len(paras)
     
     def _polish_answer(self, question: str, text: str, chunks: Optional[List[tuple]] = None) -> str:
@@ -2064,12 +2401,9 @@ STRICT RULES:
         ql = (question or "").lower()
         out: List[str] = []
         # Score terms by support (how many chunk ids) and prefer institutions/acronyms
-        scored_terms = []
-        for term in available_terms:
-            count = len(self.term_to_chunks.get(term, []))
-            scored_terms.append((count, term))
-        scored_terms.sort(reverse=True)
-        for _, term in scored_terms[:8]:
+        counts = self._term_to_chunk_count
+        scored_terms = [(counts.get(term, 0), term) for term in available_terms]
+        for _, term in heapq.nlargest(8, scored_terms):
             if len(out) >= 5:
                 break
             if term.upper() in ACRONYM_EXPANSIONS:
@@ -2093,11 +2427,8 @@ STRICT RULES:
         if not self.reviewer:
             return answer
         
-        import time
-        from lib.config import QUERY_TIMEOUT_SECONDS
         
         print(f"  [REVIEW] Starting review of answer ({len(answer)} chars, {len(chunks) if chunks else 0} chunks)")
-        import sys
         sys.stdout.flush()  # Ensure output is visible
         current_answer = answer
         iteration = 0
@@ -2203,8 +2534,17 @@ STRICT RULES:
     def _extract_terms_from_chunks(self, chunks: List[tuple]) -> Set[str]:
         """Return lowercased terms found in chunks that are present in the index."""
         terms: Set[str] = set()
-        for text, _ in chunks:
-            tl = text.lower()
+        automaton = self._get_term_automaton()
+        if automaton is not None:
+            # Single pass per chunk regardless of index size
+            for chunk in chunks:
+                for _end, lt in automaton.iter(_text_lower(chunk)):
+                    terms.add(lt)
+                    if len(terms) > 50:
+                        return terms
+            return terms
+        for chunk in chunks:
+            tl = _text_lower(chunk)
             # Simple token scan: collect words that are index keys and appear in text
             for term in self.term_to_chunks.keys():
                 lt = term.lower()
@@ -2214,79 +2554,29 @@ STRICT RULES:
                         break
         return terms
     
+    def _get_term_automaton(self):
+        """Aho-Corasick automaton over the lowercased index terms (built lazily, None without pyahocorasick)."""
+        if ahocorasick is None:
+            return None
+        if self._term_automaton is None:
+            automaton = ahocorasick.Automaton()
+            for term in self.term_to_chunks.keys():
+                lt = term.lower()
+                automaton.add_word(lt, lt)
+            if len(automaton) == 0:
+                return None
+            automaton.make_automaton()
+            self._term_automaton = automaton
+        return self._term_automaton
+    
     def _build_prompt(self, question: str, chunks: list) -> str:
         """Build prompt for LLM narrative generation."""
-        chunks_text = "\n\n".join([
-            f"--- CHUNK {i+1} ---\n{text}"
-            for i, (text, meta) in enumerate(chunks)
-        ])
+        chunks_text = _render_chunks(chunks)
         
-        return f"""You are a banking historian. Answer this question: {question}
-
-DOCUMENT CHUNKS:
-{chunks_text}
-
-CRITICAL FRAMEWORK - Create THEMATIC narrative with CULTURAL ANALYSIS:
-
-1. STRUCTURE - THEMATIC SECTIONS with multiple focused paragraphs:
-   - Use section headings: "**Theme Name:**"
-   - Each section = 2-4 paragraphs on ONE theme
-   - Example: "**British Colonial Impact:**" then 3 paragraphs about EIC, Brahmins, Dalits
-
-2. PARAGRAPH LENGTH (HARD LIMIT - COUNT SENTENCES):
-   - MAXIMUM 3 sentences per paragraph
-   - After 3 sentences, MANDATORY break
-   - Each paragraph = one subtopic within section theme
-
-3. ENTITY INTRODUCTIONS (MANDATORY):
-   - When first mentioning an acronym or institution, expand it once in-line with role (e.g., "*Vneshtorg* (Soviet Bank for Foreign Trade, EXIM role)").
-   - When first mentioning a person, add a 1-clause apposition with role and why relevant to the SUBJECT (e.g., "Viktor Gerashchenko, Vneshtorg deputy who managed foreign credits").
-   - NO name-dropping. If you cannot state relevance in one clause, omit the name.
-   - DO NOT use an acronym (e.g., BSU) unless you can define it from the provided chunks in-line. If definition is not present in the chunks, avoid using the acronym.
-   - For every non-subject entity mentioned, explicitly state its relationship to the SUBJECT in the same sentence.
-
-3. COMPARATIVE ANALYSIS - Draw comparisons across groups when relevant:
-   - PARALLEL PATTERNS: Multiple groups showing same dynamics (endogamy, exclusion)
-   - CONTRASTING TREATMENT: Different treatment of similar groups
-     Example: "As Russia restricted Jewish rights in 1880, it expanded Old Believer freedoms in 1883"
-   - COMPETITION/COLLABORATION: Groups competing or partnering
-     Example: "Bukharan Jewish factories rivaled Old Believer counterparts in Moscow"
-    - HIERARCHY: Show how groups related (Brahmin dominance excluded Dalits)
-    - Draw comparisons only when supported by the documents
-
-4. DEFINE SPECIALIZED TERMS on first use:
-   - Dalit (untouchable, lowest Hindu caste, faced severe discrimination)
-   - Brahmin (priestly caste, highest in Hindu hierarchy)
-   - Kohanim (Jewish priestly caste), Court Jew (banker to monarchs)
-   - Old Believers (Russian Orthodox sect, split after 17th century reforms)
-   - Always explain hierarchy/status
-
-5. PARAGRAPH RULES (HARD LIMITS):
-   - MAX 3 sentences per paragraph (COUNT THEM). If over 3, SPLIT.
-   - MIN 5 paragraphs total (≥3 if content is truly limited to one era).
-   - ONE clear topic per paragraph; use transitions ("Building on this...", "During this period...", "As a result...").
-
-6. WRITING STYLE:
-   - BERNANKE: Causal analysis
-   - MAYA ANGELOU: Humanizing details
-   - NO LIST-LIKE WRITING
-
-6. MECHANICS:
-   - SUBJECT ACTIVE: *Rothschild* hired (NOT was hired by)
-   - Institutions italicized: *Rothschild*, *Hope*, *Securities and Exchange Commission (SEC)* when relevant
-   - People regular: e.g., Joseph P. Kennedy Sr.
-   - NO PLATITUDES
-
-7. COVERAGE & CONSISTENCY:
-   - Cover all eras present in the provided documents; do not stop at an early decade if later decades are present.
-   - For city/branch or successor cases, include the successor era if mentioned or add a "See also" in Related Questions.
-   - End with "Related Questions:" (3–5 precise, document-grounded items; no generic "impact/why" questions).
-
-Generate a thematically organized narrative with cultural explanations:"""
+        return _PROMPT_TEMPLATE.format_map({"question": question, "chunks_text": chunks_text})
     
     def _generate_batched_narrative(self, question: str, chunks: list) -> str:
         """Generate narrative from chunks in batches, with logging."""
-        import time
         batch_start = time.time()
         print(f"    [BATCH] Starting batched narrative generation with {len(chunks)} chunks")
         
@@ -2296,7 +2586,6 @@ Generate a thematically organized narrative with cultural explanations:"""
         # Calculate token-based batches (more efficient than chunk count)
         # Estimate: each chunk ≈ ESTIMATED_WORDS_PER_CHUNK words ≈ ESTIMATED_WORDS_PER_CHUNK * TOKENS_PER_WORD tokens
         tokens_per_chunk = ESTIMATED_WORDS_PER_CHUNK * TOKENS_PER_WORD
-        chunks_per_batch = max(1, int(MAX_TOKENS_PER_REQUEST / tokens_per_chunk))
         
         # Also account for prompt overhead (question + instructions ≈ 2000 tokens)
         prompt_overhead_tokens = 2000
@@ -2307,24 +2596,31 @@ Generate a thematically organized narrative with cultural explanations:"""
         estimated_time = total_batches * pause_time
         print(f"  [INFO] Will process {total_batches} batches (~{chunks_per_batch} chunks/batch, ~{estimated_time//60} min {estimated_time%60} sec)")
         
-        for i in range(0, len(chunks), chunks_per_batch):
-            batch = chunks[i:i + chunks_per_batch]
-            batch_num = i // chunks_per_batch + 1
-            
+        batches = [chunks[i:i + chunks_per_batch] for i in range(0, len(chunks), chunks_per_batch)]
+        for batch_num, batch in enumerate(batches, 1):
             # Calculate actual tokens for this batch
-            batch_words = sum(len(chunk[0].split()) for chunk in batch)
+            batch_words = sum(_chunk_word_count(chunk) for chunk in batch)
             batch_tokens = int(batch_words * TOKENS_PER_WORD + prompt_overhead_tokens)
-            
-            print(f"  [BATCH {batch_num}/{total_batches}] Processing {len(batch)} chunks (~{batch_tokens:,} tokens)...")
-            
-            # Generate narrative for this batch
-            narrative = self.llm.generate_answer(question, batch)
-            narratives.append(narrative)
-            
-            # Wait between batches to avoid rate limit (if not last batch)
-            if i + chunks_per_batch < len(chunks):
-                print(f"  [WAIT] Pausing {pause_time} seconds to avoid rate limit...")
-                time.sleep(pause_time)
+            print(f"  [BATCH {batch_num}/{total_batches}] Queued {len(batch)} chunks (~{batch_tokens:,} tokens)")
+        
+        if self.use_async and len(batches) > 1:
+            # Concurrent submission bounded by a semaphore; the LLM client retries 429s itself
+            print(f"  [ASYNC] Running {len(batches)} batches concurrently (max {BATCH_NARRATIVE_CONCURRENCY} at a time)")
+            narratives = self._run_batches_async(question, batches)
+        else:
+            for batch_num, batch in enumerate(batches, 1):
+                call_start = time.time()
+                print(f"  [BATCH {batch_num}/{total_batches}] Processing {len(batch)} chunks...")
+                
+                # Generate narrative for this batch
+                narrative = self.llm.generate_answer(question, batch)
+                narratives.append(narrative)
+                
+                # Wait between batches to avoid rate limit (if not last batch); the call itself counts toward the pause
+                remaining = pause_time - (time.time() - call_start)
+                if batch_num < len(batches) and remaining > 0:
+                    print(f"  [WAIT] Pausing {remaining:.1f} seconds to avoid rate limit...")
+                    time.sleep(remaining)
         
         # Combine all narratives
         print(f"  [COMBINE] Merging {len(narratives)} narrative sections...")
@@ -2365,6 +2661,45 @@ Answer:"""
             # Fallback: just concatenate
             return "\n\n---\n\n".join(narratives)
     
+    async def _generate_batches_async(self, question: str, batches: List[list]) -> List[str]:
+        """Generate one narrative per batch concurrently, at most BATCH_NARRATIVE_CONCURRENCY in flight."""
+        semaphore = asyncio.Semaphore(BATCH_NARRATIVE_CONCURRENCY)
+        total = len(batches)
+        
+        async def run_one(batch_num: int, batch: list) -> str:
+            async with semaphore:
+                print(f"  [BATCH {batch_num}/{total}] Processing {len(batch)} chunks...")
+                result = await self.llm.generate_answer_async(question, batch)
+                print(f"  [BATCH {batch_num}/{total}] Done")
+                return result
+        
+        return await asyncio.gather(*(run_one(n, b) for n, b in enumerate(batches, 1)))
+    
+    def _run_batches_async(self, question: str, batches: List[list]) -> List[str]:
+        """Run _generate_batches_async from sync code, using a worker thread if a loop is already running."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No running loop - safe to use asyncio.run()
+            return asyncio.run(self._generate_batches_async(question, batches))
+        
+        # We're in an async context - run a new loop in a thread
+        result = [None]
+        exception = [None]
+        
+        def run_in_thread():
+            try:
+                result[0] = asyncio.run(self._generate_batches_async(question, batches))
+            except Exception as e:
+                exception[0] = e
+        
+        thread = threading.Thread(target=run_in_thread)
+        thread.start()
+        thread.join()
+        if exception[0]:
+            raise exception[0]
+        return result[0]
+    
     def get_stats(self) -> Dict:
         """Get database statistics."""
         return {
@@ -2404,26 +2739,29 @@ Answer:"""
             for raw in canonical_map.get(term, []):
                 add_phrase(raw)
         
-        for token in raw_tokens:
-            if token.isupper() and len(token) >= 3:
-                add_phrase(token)
-                expansion = ACRONYM_EXPANSIONS.get(token)
-                if expansion:
-                    add_phrase(expansion.lower())
-        
-        for content in re.findall(r'\(([^)]+)\)', question):
-            phrase = content.strip()
-            if not phrase:
-                continue
-            if phrase.isupper():
-                add_phrase(phrase)
-                expansion = ACRONYM_EXPANSIONS.get(phrase)
-                if expansion:
-                    add_phrase(expansion.lower())
-            else:
-                add_phrase(phrase.lower())
-                if phrase.strip().lower() == "securities and exchange commission":
-                    add_phrase("securities & exchange commission")
+        # Acronyms: raw_tokens come from the question, so an all-lowercase question has none
+        if not question.islower():
+            for token in raw_tokens:
+                if token.isupper() and len(token) >= 3:
+                    add_phrase(token)
+                    expansion = ACRONYM_EXPANSIONS.get(token)
+                    if expansion:
+                        add_phrase(expansion.lower())
+        
+        if '(' in question:
+            for content in _PAREN_RE.findall(question):
+                phrase = content.strip()
+                if not phrase:
+                    continue
+                if phrase.isupper():
+                    add_phrase(phrase)
+                    expansion = ACRONYM_EXPANSIONS.get(phrase)
+                    if expansion:
+                        add_phrase(expansion.lower())
+                else:
+                    add_phrase(phrase.lower())
+                    if phrase.strip().lower() == "securities and exchange commission":
+                        add_phrase("securities & exchange commission")
         
         return subject_terms, subject_phrases
 
@@ -2466,15 +2804,13 @@ Answer:"""
         
         primary_term = primary_term.lower()
         
-        # Import sentence splitting
-        from .text_utils import split_into_sentences
         
         modified_chunks = []
         reduced_count = 0
         
         for chunk in chunks:
             text = chunk[0]
-            text_lower = text.lower()
+            text_lower = _text_lower(chunk)
             meta = chunk[1]
             
             # Check if primary term appears in text
@@ -2556,7 +2892,7 @@ Answer:"""
         all_chunk_years = []
         for chunk in chunks:
             text = chunk[0]
-            matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+            matches = _YEAR_RE.findall(text)
             if matches:
                 all_chunk_years.extend(int(m) for m in matches)
         
@@ -2566,11 +2902,10 @@ Answer:"""
         later_period_chunks = []  # Chunks from later periods that might not match perfectly
         
         for chunk in chunks:
-            text_lower = chunk[0].lower()
-            text = chunk[0]
+            text_lower = _text_lower(chunk)
             
             # Extract latest year from chunk
-            matches = re.findall(r'\b(1[6-9]\d{2}|20[0-2]\d)\b', text)
+            matches = _YEAR_RE.findall(chunk[0])
             latest_year = max(int(m) for m in matches) if matches else 0
             # Consider it "later period" if it's significantly after the median, or if no median, after earliest
             if median_year:
@@ -2617,8 +2952,6 @@ Answer:"""
         Returns:
             Preprocessed chunks if file exists, None otherwise
         """
-        import os
-        from .config import DATA_DIR
         
         # Extract primary term from question
         question_lower = question.lower().strip()
@@ -2627,47 +2960,56 @@ Answer:"""
         dedup_dir = os.path.join(DATA_DIR, 'deduplicated_terms')
         cache_file = os.path.join(dedup_dir, 'deduplicated_cache.json')
         
-        # Load cache if available
-        if os.path.exists(cache_file):
+        # Load cache if available (parsed once, re-read only when the file's mtime changes)
+        try:
+            mtime = os.stat(cache_file).st_mtime
+        except OSError:
+            mtime = None
+        if mtime is None:
+            deduplicated_cache = {}
+        elif self._dedup_cache is not None and mtime == self._dedup_cache_mtime:
+            deduplicated_cache = self._dedup_cache
+        else:
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    deduplicated_cache = json.load(f)
+                with open(cache_file, 'rb') as f:
+                    raw = f.read()
+                deduplicated_cache = orjson.loads(raw) if orjson is not None else json.loads(raw)
             except:
                 deduplicated_cache = {}
-        else:
-            deduplicated_cache = {}
+            self._dedup_cache = deduplicated_cache
+            self._dedup_cache_mtime = mtime
         
         if not deduplicated_cache:
             return None
         
         # Try to extract the main subject from common query patterns
-        potential_terms = []
+        potential_terms: Dict[str, None] = {}  # ordered set: each term is probed once
         
         # Pattern 1: "Tell me about X" -> "X"
         if 'tell me about' in question_lower:
             subject = question_lower.replace('tell me about', '').strip()
             if subject:
-                potential_terms.append(subject)
+                potential_terms[subject] = None
                 # Extract primary noun (first word, capitalized)
                 words = subject.split()
                 if words:
                     primary_word = words[0]
                     # Try capitalized version (proper noun)
-                    potential_terms.append(primary_word.capitalize())
-                    potential_terms.append(primary_word.lower())
+                    potential_terms[primary_word.capitalize()] = None
+                    potential_terms[primary_word.lower()] = None
                     # Also try plural/singular variations
                     if subject.endswith('s'):
-                        potential_terms.append(subject[:-1])  # Remove 's'
-                        potential_terms.append(subject[:-1].capitalize())
+                        potential_terms[subject[:-1]] = None  # Remove 's'
+                        potential_terms[subject[:-1].capitalize()] = None
                     else:
-                        potential_terms.append(subject + 's')  # Add 's'
+                        potential_terms[subject + 's'] = None  # Add 's'
         
         # Pattern 2: "What is X" or "Who is X" -> "X"
         for pattern in ['what is', 'who is', 'when is', 'where is', 'how is']:
             if pattern in question_lower:
                 subject = question_lower.split(pattern, 1)[1].strip().split()[0:3]  # Take up to 3 words
                 if subject:
-                    potential_terms.append(' '.join(subject))
+                    potential_terms[' '.join(subject)] = None
         
         # Pattern 3: Extract meaningful words (not stop words)
         words = question_lower.split()
@@ -2675,39 +3017,34 @@ Answer:"""
         meaningful_words = [w for w in words if w not in STOP_WORDS and len(w) > 2]
         
         # Add single words
-        potential_terms.extend(meaningful_words)
+        potential_terms.update(dict.fromkeys(meaningful_words))
         
         # Add multi-word phrases (2-3 words)
         for i in range(len(meaningful_words) - 1):
             phrase = f"{meaningful_words[i]}_{meaningful_words[i+1]}"
-            potential_terms.append(phrase)
+            potential_terms[phrase] = None
         for i in range(len(meaningful_words) - 2):
             phrase = f"{meaningful_words[i]}_{meaningful_words[i+1]}_{meaningful_words[i+2]}"
-            potential_terms.append(phrase)
+            potential_terms[phrase] = None
         
         # Check if any term has deduplicated content in cache
         # Try multiple variations: exact, lowercase, capitalized, title case
-        for term in potential_terms:
-            variations = [
+        # (a variant already probed for an earlier term is not looked up again)
+        variants = dict.fromkeys(
+            variant
+            for term in potential_terms
+            for variant in (
                 term,  # Exact
                 term.lower(),  # Lowercase
                 term.capitalize(),  # Capitalized
                 term.title() if ' ' in term else term.capitalize(),  # Title case for multi-word
-            ]
-            # Remove duplicates while preserving order
-            seen = set()
-            unique_variations = []
-            for v in variations:
-                if v not in seen:
-                    seen.add(v)
-                    unique_variations.append(v)
-            
-            for variant in unique_variations:
-                if variant in deduplicated_cache:
-                    deduplicated_text = deduplicated_cache[variant]
-                    if deduplicated_text and deduplicated_text.strip():
-                        print(f"  [CACHE] Found preprocessed deduplicated text for '{variant}' ({len(deduplicated_text):,} chars)")
-                        return self._split_large_deduplicated_text(deduplicated_text, chunks[0][1] if chunks else {})
+            )
+        )
+        for variant in variants:
+            deduplicated_text = deduplicated_cache.get(variant)
+            if deduplicated_text and deduplicated_text.strip():
+                print(f"  [CACHE] Found preprocessed deduplicated text for '{variant}' ({len(deduplicated_text):,} chars)")
+                return self._split_large_deduplicated_text(deduplicated_text, chunks[0][1] if chunks else {})
         
         return None
     
@@ -2725,36 +3062,20 @@ Answer:"""
         Returns:
             List of (text, metadata) tuples
         """
-        from .config import MAX_WORDS_PER_REQUEST
         
         if max_words_per_chunk is None:
             # Use the full LLM limit - MAX_WORDS_PER_REQUEST already accounts for prompt overhead
             # It's calculated as MAX_TOKENS_PER_REQUEST / TOKENS_PER_WORD, which leaves room for prompt
             max_words_per_chunk = MAX_WORDS_PER_REQUEST
         
-        words = text.split()
-        total_words = len(words)
+        total_words = len(text.split())
         
         # If text fits in one chunk, return as-is
         if total_words <= max_words_per_chunk:
             return [(text, metadata)]
         
         # Split by sentences first (preserve sentence boundaries)
-        sentences = []
-        # Split on sentence endings
-        sentence_parts = re.split(r'([.!?]+)\s+', text)
-        current_sentence = ""
-        for i, part in enumerate(sentence_parts):
-            current_sentence += part
-            # If next part starts with capital or is end, finish sentence
-            if i + 1 < len(sentence_parts):
-                next_part = sentence_parts[i + 1].strip()
-                if next_part and next_part[0].isupper():
-                    sentences.append(current_sentence.strip())
-                    current_sentence = ""
-            else:
-                if current_sentence.strip():
-                    sentences.append(current_sentence.strip())
+        sentences = split_into_sentences(text)  # From text_utils
         
         # If no sentences found, split by paragraphs
         if not sentences:
@@ -2765,33 +3086,34 @@ Answer:"""
         if not sentences:
             sentences = [text]
         
-        # Group sentences into chunks
-        chunks = []
+        # Group sentences into chunks; each sentence is tokenized once and its word count
+        # is carried with the chunk so the safety check below doesn't re-split chunk text
+        chunks = []  # (chunk_text, word_count)
         current_chunk = []
         current_word_count = 0
         
         for sentence in sentences:
-            sentence_words = len(sentence.split())
+            words_in_sentence = sentence.split()
+            sentence_words = len(words_in_sentence)
             
             # If single sentence exceeds limit, split it by words
             if sentence_words > max_words_per_chunk:
                 # Add current chunk if any
                 if current_chunk:
-                    chunks.append(" ".join(current_chunk))
+                    chunks.append((" ".join(current_chunk), current_word_count))
                     current_chunk = []
                     current_word_count = 0
                 
                 # Split long sentence into word chunks
-                words_in_sentence = sentence.split()
-                for i in range(0, len(words_in_sentence), max_words_per_chunk):
+                for i in range(0, sentence_words, max_words_per_chunk):
                     chunk_words = words_in_sentence[i:i + max_words_per_chunk]
-                    chunks.append(" ".join(chunk_words))
+                    chunks.append((" ".join(chunk_words), len(chunk_words)))
             else:
                 # Check if adding this sentence would exceed limit
                 if current_word_count + sentence_words > max_words_per_chunk:
                     # Save current chunk if it has content
                     if current_chunk:
-                        chunks.append(" ".join(current_chunk))
+                        chunks.append((" ".join(current_chunk), current_word_count))
                     # Start new chunk with this sentence
                     current_chunk = [sentence]
                     current_word_count = sentence_words
@@ -2802,12 +3124,11 @@ Answer:"""
         
         # Add final chunk
         if current_chunk:
-            chunks.append(" ".join(current_chunk))
+            chunks.append((" ".join(current_chunk), current_word_count))
         
         # Verify all chunks are within limit (safety check)
         verified_chunks = []
-        for chunk_text in chunks:
-            chunk_words = len(chunk_text.split())
+        for chunk_text, chunk_words in chunks:
             if chunk_words > max_words_per_chunk:
                 # This shouldn't happen, but if it does, split by words as fallback
                 print(f"  [WARN] Chunk exceeded limit ({chunk_words:,} > {max_words_per_chunk:,}), splitting by words")
@@ -2818,14 +3139,15 @@ Answer:"""
             else:
                 verified_chunks.append(chunk_text)
         
-        print(f"  [DEDUP] Split deduplicated text ({total_words:,} words) into {len(verified_chunks)} chunks (max {max_words_per_chunk:,} words each)")
+        if VERBOSE_QUERY_LOGGING:
+            print(f"  [DEDUP] Split deduplicated text ({total_words:,} words) into {len(verified_chunks)} chunks (max {max_words_per_chunk:,} words each)")
         
         return [(chunk_text, metadata) for chunk_text in verified_chunks]
     
     def _deduplicate_and_combine_chunks(self, chunks: List[tuple]) -> List[tuple]:
         """
         Deduplicate and combine chunks before sending to LLM.
-        Uses file-based deduplication: writes chunks to temp file, deduplicates, reads back.
+        Works in memory: chunk texts are deduplicated in order and zipped back with their metadata.
         
         Removes:
         - Exact duplicates
@@ -2841,63 +3163,35 @@ Answer:"""
         if not chunks:
             return chunks
         
-        import os
-        import tempfile
-        from .config import TEMP_DIR
-        
-        # Step 1: Write all chunks to a temp file
-        os.makedirs(TEMP_DIR, exist_ok=True)
-        temp_file = os.path.join(TEMP_DIR, f"chunks_{hash(str(chunks))}.txt")
-        
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            for text, meta in chunks:
-                f.write(text + "\n\n---CHUNK_BOUNDARY---\n\n")
-        
-        # Step 2: Deduplicate the file (sentence and phrase level)
-        deduplicated_text = self._deduplicate_text_file(temp_file)
+        # Deduplicate chunk texts (sentence and phrase level), one result per input chunk
+        deduplicated_texts = self._deduplicate_chunk_texts([text for text, _ in chunks])
         
-        # Step 3: Split back into chunks (by boundary markers)
-        deduplicated_chunks_text = deduplicated_text.split("\n\n---CHUNK_BOUNDARY---\n\n")
-        deduplicated_chunks_text = [c.strip() for c in deduplicated_chunks_text if c.strip()]
-        
-        # Step 4: Create chunk tuples (preserve metadata from first chunk if possible)
+        # Keep each chunk's own metadata; drop chunks whose text was entirely duplicate
         result = []
-        for i, text in enumerate(deduplicated_chunks_text):
-            meta = chunks[i][1] if i < len(chunks) else {}
-            result.append((text, meta))
-        
-        # Clean up temp file
-        try:
-            os.remove(temp_file)
-        except:
-            pass
+        for text, (_, meta) in zip(deduplicated_texts, chunks):
+            if text:
+                result.append((text, meta))
         
         if len(result) < len(chunks):
             print(f"    [DEDUP] Reduced {len(chunks)} chunks to {len(result)} after deduplication")
         
         return result
     
-    def _deduplicate_text_file(self, filepath: str) -> str:
+    def _deduplicate_chunk_texts(self, chunk_texts: List[str]) -> List[str]:
         """
-        Deduplicate text file at sentence and phrase level.
+        Deduplicate chunk texts at sentence and phrase level.
         Removes duplicate sentences and longer phrases (7+ words).
+        Returns one string per input text (empty when nothing unique remains).
         """
         # Use shared split_into_sentences from text_utils.py
         
-        # Read file
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Split by chunk boundaries
-        chunks = content.split("\n\n---CHUNK_BOUNDARY---\n\n")
-        
-        # Deduplicate chunks
-        seen_sentences = set()
+        seen_sentences = set()  # _dedup_key digests, not the sentences themselves
         seen_phrases_7plus = set()  # Only track 7+ word phrases
         deduplicated_chunks = []
         
-        for chunk in chunks:
+        for chunk in chunk_texts:
             if not chunk.strip():
+                deduplicated_chunks.append("")
                 continue
             
             # Split into sentences
@@ -2906,10 +3200,10 @@ Answer:"""
             # Filter: keep only unique sentences and phrases
             unique_sentences = []
             for sentence in sentences:
-                normalized = sentence.lower().strip()
-                if normalized not in seen_sentences:
+                key = _dedup_key(sentence.lower().strip())
+                if key not in seen_sentences:
                     unique_sentences.append(sentence)
-                    seen_sentences.add(normalized)
+                    seen_sentences.add(key)
             
             # Check for longer duplicate phrases (7+ words) within remaining sentences
             filtered_sentences = []
@@ -2917,40 +3211,44 @@ Answer:"""
                 words = sentence.split()
                 # If sentence has 7+ words, check if it's a duplicate phrase
                 if len(words) >= 7:
-                    normalized_sent = sentence.lower().strip()
-                    if normalized_sent not in seen_phrases_7plus:
+                    key = _dedup_key(sentence.lower().strip())
+                    if key not in seen_phrases_7plus:
                         filtered_sentences.append(sentence)
-                        seen_phrases_7plus.add(normalized_sent)
+                        seen_phrases_7plus.add(key)
                 else:
                     # Short sentence - keep it
                     filtered_sentences.append(sentence)
             
-            if filtered_sentences:
-                deduplicated_chunk = " ".join(filtered_sentences)
-                deduplicated_chunks.append(deduplicated_chunk)
+            deduplicated_chunks.append(" ".join(filtered_sentences).strip())
         
-        # Join chunks back with boundaries
-        return "\n\n---CHUNK_BOUNDARY---\n\n".join(deduplicated_chunks)
+        return deduplicated_chunks
     
     def _estimate_tokens_for_chunks(self, chunks: List[tuple]) -> int:
-        """Estimate token count for chunks."""
-        total_words = sum(len(chunk[0].split()) for chunk in chunks)
-        return int(total_words * TOKENS_PER_WORD)
+        """Estimate token count for chunks (character heuristic, no word splitting)."""
+        total_chars = sum(len(chunk[0]) for chunk in chunks)
+        return total_chars // CHARS_PER_TOKEN
     
     def _record_token_usage(self, tokens: int):
         """Record token usage with timestamp."""
-        import time
-        self._token_usage.append((time.time(), tokens))
-        # Clean up old entries (older than 1 minute)
-        cutoff = time.time() - 60
-        self._token_usage = [(ts, t) for ts, t in self._token_usage if ts > cutoff]
+        now = time.time()
+        with self._token_usage_lock:
+            self._token_usage.append((now, tokens))
+            self._token_usage_sum += tokens
+            # Clean up old entries (older than 1 minute)
+            self._expire_token_usage(now - 60)
+    
+    def _expire_token_usage(self, cutoff: float):
+        """Drop usage entries at or before cutoff, keeping the running sum in step (caller holds the lock)."""
+        usage = self._token_usage
+        while usage and usage[0][0] <= cutoff:
+            self._token_usage_sum -= usage.popleft()[1]
     
     def _wait_for_token_rate_limit(self, chunks: Optional[List[tuple]] = None):
         """Wait if we're approaching token rate limit."""
-        import time
         # Calculate tokens used in last minute
-        cutoff = time.time() - 60
-        recent_tokens = sum(t for ts, t in self._token_usage if ts > cutoff)
+        with self._token_usage_lock:
+            self._expire_token_usage(time.time() - 60)
+            recent_tokens = self._token_usage_sum
         
         # Estimate tokens for this request
         if chunks:
@@ -2972,12 +3270,11 @@ Answer:"""
         
         Uses generate_answer to ensure consistent narrative quality (same prompt as everywhere else).
         """
-        import time
-        from lib.config import MAX_TOKENS_PER_REQUEST, MAX_TOKENS_PER_MINUTE
         llm_start = time.time()
         chunk_count = len(chunks)
         estimated_input_tokens = self._estimate_tokens_for_chunks(chunks)
-        print(f"    [LLM_CALL] Starting LLM call with {chunk_count} chunks (~{estimated_input_tokens:,} tokens)")
+        if VERBOSE_QUERY_LOGGING:
+            print(f"    [LLM_CALL] Starting LLM call with {chunk_count} chunks (~{estimated_input_tokens:,} tokens)")
         # Expose last chunk count for server/frontend status
         try:
             self.last_chunk_count = chunk_count
@@ -3008,18 +3305,19 @@ Answer:"""
         try:
             self._wait_for_token_rate_limit(chunks)
             # Use generate_answer to get consistent narrative quality (uses build_prompt with all rules)
-            print(f"    [LLM_CALL] Calling generate_answer (uses full narrative prompt)...")
+            if VERBOSE_QUERY_LOGGING:
+                print(f"    [LLM_CALL] Calling generate_answer (uses full narrative prompt)...")
             result = self.llm.generate_answer(question, chunks)
             estimated_output_tokens = len(result.split()) * TOKENS_PER_WORD
             estimated_total = estimated_input_tokens + estimated_output_tokens
             self._record_token_usage(estimated_total)
             llm_duration = time.time() - llm_start
-            print(f"    [LLM_CALL] Completed in {llm_duration:.1f}s (~{estimated_total:,} total tokens, {len(result)} chars)")
+            if VERBOSE_QUERY_LOGGING:
+                print(f"    [LLM_CALL] Completed in {llm_duration:.1f}s (~{estimated_total:,} total tokens, {len(result)} chars)")
             return result
         except Exception as e:
             llm_duration = time.time() - llm_start
             print(f"    [LLM_CALL] FAILED after {llm_duration:.1f}s: {type(e).__name__}: {e}")
-            import traceback
             traceback.print_exc()
             raise
 
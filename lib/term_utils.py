@@ -1,4 +1,5 @@
 import re
+from functools import lru_cache
 
 _TAG_RE = re.compile(r"<[^>]+>")
 
@@ -10,6 +11,7 @@ def strip_tags(text: str) -> str:
 POSSESSIVE_PATTERN = re.compile(r"('s|’s)$", re.IGNORECASE)
 
 
+@lru_cache(maxsize=100_000)
 def canonicalize_term(term: str) -> str:
     """
     Normalize a term PRESERVING capitalization.
@@ -25,9 +27,12 @@ def canonicalize_term(term: str) -> str:
     if not term:
         return term
     
-    # Remove possessives ('s or 's) but preserve everything else
-    t = term.replace("'", "'")  # Normalize apostrophes
-    t = POSSESSIVE_PATTERN.sub('', t)  # Remove 's
+    # Fast path: without an apostrophe there is no possessive to remove (the common case)
+    if "'" not in term and "’" not in term:
+        return term.strip()
+    
+    # Remove possessives ('s or ’s) but preserve everything else
+    t = POSSESSIVE_PATTERN.sub('', term)  # Remove 's
     t = t.replace("'", "")  # Remove any remaining apostrophes
     t = t.strip()
     
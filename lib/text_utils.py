@@ -5,6 +5,11 @@ Extracted from duplicate implementations across the codebase.
 import re
 
 
+# A sentence runs from its first non-space character through a run of .!? that is
+# followed by whitespace (or to the end of the text), as the old re.split pairing did
+_SENTENCE_RE = re.compile(r'(?=\S).*?(?:[.!?]+(?=\s)|\Z)', re.DOTALL)
+
+
 def split_into_sentences(text: str) -> list:
     """
     Split text into sentences, preserving punctuation.
@@ -15,16 +20,8 @@ def split_into_sentences(text: str) -> list:
     Returns:
         List of sentences (strings)
     """
-    # Split on sentence endings, but preserve them
-    sentences = re.split(r'([.!?]+)\s+', text)
-    result = []
-    for i in range(0, len(sentences) - 1, 2):
-        if i + 1 < len(sentences):
-            sentence = (sentences[i] + sentences[i + 1]).strip()
-            if sentence:
-                result.append(sentence)
-    if len(sentences) % 2 == 1 and sentences[-1].strip():
-        result.append(sentences[-1].strip())
+    # One finditer pass over the text, keeping sentence-ending punctuation
+    result = [m.group(0).strip() for m in _SENTENCE_RE.finditer(text)]
     return result if result else [text]
 
 
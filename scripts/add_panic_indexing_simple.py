@@ -6,6 +6,12 @@ import json
 import re
 import chromadb
 
+# Optional: orjson reads/writes the large indices file several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 print("="*70)
 print("ADDING PANIC INDEXING")
 print("="*70)
@@ -13,7 +19,12 @@ print()
 
 # Load current index
 print("1. Loading current index...")
-indices = json.load(open('data/indices.json', encoding='utf-8'))
+if orjson is not None:
+    with open('data/indices.json', 'rb') as f:
+        indices = orjson.loads(f.read())
+else:
+    with open('data/indices.json', encoding='utf-8') as f:
+        indices = json.load(f)
 term_to_chunks = indices['term_to_chunks']
 print(f"   Current terms: {len(term_to_chunks)}")
 
@@ -40,18 +51,19 @@ KNOWN_PANICS = [
     1929, 1931, 1933, 1937, 1987, 1989, 1997, 1998, 2000, 2001, 2007, 2008
 ]
 
+# One pass per chunk: a single alternation over all panic years
+PANIC_RE = re.compile(
+    r'\b(?:[Pp]anic|[Cc]risis)\s+of\s+(' + '|'.join(map(str, KNOWN_PANICS)) + r')\b'
+)
+matches = {year: [] for year in KNOWN_PANICS}
+
+for chunk_id, chunk_text in zip(chunk_ids, chunks):
+    for year in {int(m.group(1)) for m in PANIC_RE.finditer(chunk_text)}:
+        matches[year].append(chunk_id)
+
 panics_found = 0
 
-for year in KNOWN_PANICS:
-    panic_pattern = rf'\b[Pp]anic\s+of\s+{year}\b'
-    crisis_pattern = rf'\b[Cc]risis\s+of\s+{year}\b'
-    
-    matching_chunks = []
-    
-    for chunk_id, chunk_text in zip(chunk_ids, chunks):
-        if re.search(panic_pattern, chunk_text) or re.search(crisis_pattern, chunk_text):
-            matching_chunks.append(chunk_id)
-    
+for year, matching_chunks in matches.items():
     if matching_chunks:
         # Index with spaces for natural search
         term = f'panic of {year}'
@@ -66,8 +78,12 @@ print()
 # Save updated index
 print("5. Saving updated index...")
 indices['term_to_chunks'] = term_to_chunks
-with open('data/indices.json', 'w', encoding='utf-8') as f:
-    json.dump(indices, f, indent=2, ensure_ascii=False)
+if orjson is not None:
+    with open('data/indices.json', 'wb') as f:
+        f.write(orjson.dumps(indices, option=orjson.OPT_INDENT_2))
+else:
+    with open('data/indices.json', 'w', encoding='utf-8') as f:
+        json.dump(indices, f, indent=2, ensure_ascii=False)
 
 print(f"[OK] Index updated: {len(term_to_chunks)} total terms")
 print()
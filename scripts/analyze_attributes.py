@@ -1,11 +1,38 @@
 """Quick script to analyze multi-attribute families"""
 import sys
+import os
+import heapq
+import pickle
+import hashlib
+from operator import itemgetter
 sys.path.insert(0, '.')
 
+from lib.config import INDICES_FILE, TEMP_DIR
+from lib import identity_detector
 from lib.identity_detector import detect_identities_from_index
 
-print("Running identity/attribute detector...")
-results, detector = detect_identities_from_index(save_results=True)
+# Detection output changes when the index or the detector code (noise words, patterns) does,
+# so the cache is keyed by both files' mtimes. Only the plain dicts this script reads are
+# cached, not the detector object, so loading never depends on the detector's class.
+cache_key = hashlib.sha1(
+    f"{INDICES_FILE}:{os.path.getmtime(INDICES_FILE)}:"
+    f"{identity_detector.__file__}:{os.path.getmtime(identity_detector.__file__)}".encode()
+).hexdigest()
+cache_file = os.path.join(TEMP_DIR, f"analyze_attributes_cache_{cache_key}.pkl")
+
+if '--no-cache' not in sys.argv and os.path.exists(cache_file):
+    print(f"Loading cached detector results ({cache_file})...")
+    with open(cache_file, 'rb') as f:
+        explicit_identities, noise_words, family_ancestry = pickle.load(f)
+else:
+    print("Running identity/attribute detector...")
+    _, detector = detect_identities_from_index(save_results=True)
+    explicit_identities = dict(detector.explicit_identities)
+    noise_words = set(detector.noise_words)
+    family_ancestry = dict(detector.family_ancestry)
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    with open(cache_file, 'wb') as f:
+        pickle.dump((explicit_identities, noise_words, family_ancestry), f, protocol=pickle.HIGHEST_PROTOCOL)
 
 print("\n" + "="*80)
 print("FAMILIES WITH MULTIPLE ATTRIBUTES (Top 30)")
@@ -14,23 +41,20 @@ print("="*80)
 # Find families with multiple identities
 multi = {
     f: ids 
-    for f, ids in detector.explicit_identities.items() 
-    if len(ids) > 1 and f not in detector.noise_words and len(f) > 3
+    for f, ids in explicit_identities.items() 
+    if len(ids) > 1 and f not in noise_words and len(f) > 3
 }
 
-count = 0
-for family, attrs in sorted(multi.items()):
-    if count >= 30:
-        break
+# Only the first 30 families alphabetically are shown, so select them without sorting all
+for family, attrs in heapq.nsmallest(30, multi.items(), key=itemgetter(0)):
     attrs_list = sorted(attrs)
     print(f"{family.capitalize():<20} = {', '.join(attrs_list)}")
-    count += 1
 
 print("\n" + "="*80)
 print("EXPLICIT ANCESTRY (Descended From)")
 print("="*80)
 
-for family, ancestry in sorted(detector.family_ancestry.items())[:20]:
+for family, ancestry in heapq.nsmallest(20, family_ancestry.items(), key=itemgetter(0)):
     origin_fam = ancestry.get('origin_family', '')
     origin_id = ancestry.get('origin_identity', '')
     if origin_fam:
@@ -39,7 +63,7 @@ for family, ancestry in sorted(detector.family_ancestry.items())[:20]:
 print("\n" + "="*80)
 print("KEY FINDINGS")
 print("="*80)
-print(f"Total families identified: {len(detector.explicit_identities)}")
+print(f"Total families identified: {len(explicit_identities)}")
 print(f"Families with multiple attributes: {len(multi)}")
-print(f"Explicit ancestry statements: {len(detector.family_ancestry)}")
+print(f"Explicit ancestry statements: {len(family_ancestry)}")
 
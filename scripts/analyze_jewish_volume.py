@@ -1,21 +1,26 @@
 """Analyze volume of Jewish-related chunks"""
 import sys
 import os
+import re
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from lib.document_parser import load_all_documents
 from lib.index_builder import split_into_chunks
 from lib.identity_prefilter import IdentityPrefilter
 
+# Optional: Aho-Corasick scans each chunk once for every keyword of every group
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 print("Analyzing identity distribution...\n")
 
-# Load chunks
-docs = load_all_documents(use_cache=True)
-all_chunks = []
-for doc in docs:
-    all_chunks.extend(split_into_chunks(doc['text']))
 
-print(f"Total chunks: {len(all_chunks)}\n")
+def chunk_stream():
+    """Yield chunks document by document instead of holding the whole corpus in memory."""
+    for doc in load_all_documents(use_cache=True):
+        yield from split_into_chunks(doc['text'])
 
 # Check different identity groups
 identity_groups = {
@@ -30,25 +35,46 @@ identity_groups = {
     'Other': []  # Will calculate
 }
 
-chunk_counts = {}
+chunk_counts = {group: 0 for group in identity_groups if group != 'Other'}
 
-for group, keywords in identity_groups.items():
-    if group == 'Other':
-        continue
-    
-    count = 0
-    for chunk in all_chunks:
-        chunk_lower = chunk.lower()
-        if any(keyword in chunk_lower for keyword in keywords):
-            count += 1
-    
-    chunk_counts[group] = count
+if ahocorasick is not None:
+    automaton = ahocorasick.Automaton()
+    keyword_groups = {}
+    for group in chunk_counts:
+        for keyword in identity_groups[group]:
+            keyword_groups.setdefault(keyword, set()).add(group)
+    for keyword, groups in keyword_groups.items():
+        automaton.add_word(keyword, groups)
+    automaton.make_automaton()
+else:
+    # Fallback: one compiled alternation per group, searched in C instead of a Python any() loop
+    group_res = {group: re.compile('|'.join(map(re.escape, identity_groups[group])))
+                 for group in chunk_counts if identity_groups[group]}
 
-# Calculate "Other" (has identity keywords but not in main groups)
 prefilter = IdentityPrefilter()
-total_with_identities = len(prefilter.filter_chunks(all_chunks))
-accounted_for = sum(chunk_counts.values())
-chunk_counts['Other'] = total_with_identities - accounted_for
+total_chunks = 0
+total_with_identities = 0
+# "Other" = has identity keywords but not in main groups (each chunk counted once)
+other_count = 0
+for chunk in chunk_stream():
+    total_chunks += 1
+    chunk_lower = chunk.lower()
+    if ahocorasick is not None:
+        hits = set()
+        for _, groups in automaton.iter(chunk_lower):
+            hits |= groups
+    else:
+        hits = {group for group, rx in group_res.items() if rx.search(chunk_lower)}
+    for group in hits:
+        chunk_counts[group] += 1
+    if hits:
+        total_with_identities += 1
+    elif prefilter.has_identity_keywords(chunk):
+        other_count += 1
+        total_with_identities += 1
+chunk_counts['Other'] = other_count
+
+print(f"Total chunks: {total_chunks}\n")
 
 # Show results
 print("="*70)
@@ -57,14 +83,14 @@ print("="*70)
 
 for group in sorted(chunk_counts.keys(), key=lambda x: chunk_counts[x], reverse=True):
     count = chunk_counts[group]
-    pct = count / len(all_chunks) * 100
+    pct = count / total_chunks * 100
     batches = count / 20  # Batch size of 20
     
     print(f"{group:15} {count:4} chunks ({pct:5.1f}%) = {batches:5.1f} API batches")
 
 print("="*70)
-print(f"{'Total':15} {sum(chunk_counts.values()):4} chunks with identities")
-print(f"{'No identities':15} {len(all_chunks) - sum(chunk_counts.values()):4} chunks")
+print(f"{'Total':15} {total_with_identities:4} chunks with identities")
+print(f"{'No identities':15} {total_chunks - total_with_identities:4} chunks")
 print()
 
 # Analyze Jewish split
@@ -5,13 +5,30 @@ Check status of batch detection job and retrieve results when ready.
 import sys
 import os
 import json
+import time
+import argparse
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from lib.batch_identity_detector import BatchIdentityDetector
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Check status of a batch detection job.")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep polling until the job completes instead of checking once")
+    parser.add_argument('--interval', type=float, default=30,
+                        help="Initial seconds between polls with --watch (default: 30)")
+    parser.add_argument('--max-interval', type=float, default=300,
+                        help="Upper bound for the backed-off poll interval (default: 300)")
+    parser.add_argument('--retrieve', action='store_true',
+                        help="Retrieve results on success without prompting")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
+    
     # Load job info
     job_info_file = Path('temp/batch_job_info.json')
     
@@ -38,6 +55,17 @@ def main():
         print(f"[ERROR] {status['error']}")
         return
     
+    # Poll with exponential backoff so the wait needs no re-runs but stays light on the API
+    interval = args.interval
+    while args.watch and not status['completed']:
+        print(f"[WAIT] {status['state']} - checking again in {interval:.0f}s")
+        time.sleep(interval)
+        interval = min(interval * 1.5, args.max_interval)
+        status = detector.check_job_status(job_name)
+        if 'error' in status:
+            print(f"[ERROR] {status['error']}")
+            return
+    
     state = status['state']
     print(f"State: {state}")
     
@@ -55,7 +83,10 @@ def main():
             print("[COMPLETE] Job finished successfully!")
             print("="*60)
             
-            response = input("\nRetrieve results now? (y/n): ").strip().lower()
+            if args.retrieve:
+                response = 'y'
+            else:
+                response = input("\nRetrieve results now? (y/n): ").strip().lower()
             
             if response == 'y':
                 print()
@@ -80,6 +111,8 @@ def main():
         print("\n[PENDING] Job still processing...")
         print("\nCheck again later with:")
         print("  python scripts/check_batch_status.py")
+        print("Or wait for completion with:")
+        print("  python scripts/check_batch_status.py --watch --retrieve")
 
 if __name__ == '__main__':
     main()
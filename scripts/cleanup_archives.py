@@ -4,8 +4,26 @@ Moves archives to organized structure in docs/archive/
 """
 import os
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+
+def dir_item_count_and_size(root):
+    """Entries under root (files and directories) and total file size, via one scandir walk."""
+    count = 0
+    total = 0
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                count += 1
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+    return count, total
+
+
 def main():
     base_dir = Path(".")
     archive_dir = base_dir / "docs" / "archive"
@@ -49,9 +67,9 @@ def main():
     print("=" * 60)
     for src, dst in moves:
         if src.exists():
-            size = sum(f.stat().st_size for f in src.rglob('*') if f.is_file())
+            item_count, size = dir_item_count_and_size(src)
             print(f"  {src} -> {archive_dir / dst}")
-            print(f"    ({len(list(src.rglob('*')))} items, {size / 1024 / 1024:.1f} MB)")
+            print(f"    ({item_count} items, {size / 1024 / 1024:.1f} MB)")
     
     if not moves:
         print("  No archives found to move.")
@@ -62,17 +80,36 @@ def main():
     
     # Perform moves
     print("\nMoving archives...")
+    same_fs_moves = []
+    cross_fs_moves = []
     for src, dst in moves:
         if src.exists():
             dst_full = archive_dir / dst
             if dst_full.exists():
                 print(f"  WARNING: {dst_full} already exists, skipping {src}")
                 continue
-            try:
-                shutil.move(str(src), str(dst_full))
-                print(f"  ✓ Moved {src} -> {dst_full}")
-            except Exception as e:
-                print(f"  ✗ Error moving {src}: {e}")
+            # Same filesystem: shutil.move is a cheap rename; across filesystems it copies
+            if os.stat(src).st_dev == os.stat(archive_dir).st_dev:
+                same_fs_moves.append((src, dst_full))
+            else:
+                cross_fs_moves.append((src, dst_full))
+    
+    def move_one(pair):
+        src, dst_full = pair
+        try:
+            shutil.move(str(src), str(dst_full))
+            return f"  ✓ Moved {src} -> {dst_full}"
+        except Exception as e:
+            return f"  ✗ Error moving {src}: {e}"
+    
+    for pair in same_fs_moves:
+        print(move_one(pair))
+    
+    # Cross-filesystem copies are independent, so overlap them
+    if cross_fs_moves:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for message in executor.map(move_one, cross_fs_moves):
+                print(message)
     
     print("\n✓ Archive cleanup complete!")
     print(f"  Archives are now in: {archive_dir}")
@@ -6,11 +6,43 @@ import sys
 import os
 sys.path.insert(0, '.')
 
+import re
 import json
-import time
+import asyncio
+import unicodedata
 from tqdm import tqdm
 from lib.llm import LLMAnswerGenerator
 
+# Optional: orjson parses/serializes the large JSON files several times faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Optional: ijson streams the index so the chunk-id lists never need to be held at once
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def read_json(path):
+    """Load a JSON file, with orjson when available."""
+    with open(path, 'rb') as f:
+        raw = f.read()
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
+
+def write_json(path, obj, indent=False):
+    """Write obj as UTF-8 JSON (2-space indent if requested), with orjson when available."""
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(obj, f, indent=2 if indent else None, ensure_ascii=False)
+
+
 print("="*80)
 print("FILTERING INDEXED TERMS WITH LLM")
 print("="*80)
@@ -18,62 +50,94 @@ print()
 
 # Load current index
 print("1. Loading current index...")
-from lib.config import INDICES_FILE
-with open(INDICES_FILE, 'r', encoding='utf-8') as f:
-    data = json.load(f)
-
-terms = list(data.get('term_to_chunks', {}).keys())
+from lib.config import INDICES_FILE, CHARS_PER_TOKEN
+# Only the term names are needed, not their chunk lists
+if ijson is not None:
+    with open(INDICES_FILE, 'rb') as f:
+        terms = [term for term, _chunk_ids in ijson.kvitems(f, 'term_to_chunks')]
+else:
+    terms = list(read_json(INDICES_FILE).get('term_to_chunks', {}).keys())
 print(f"   Total terms in index: {len(terms)}")
-print()
 
-# Test LLM initialization
-print("2. Testing LLM...")
-test_llm = LLMAnswerGenerator()
-if not test_llm.client:
-    print("ERROR: LLM initialization failed!")
-    sys.exit(1)
-print()
+# Keep/drop decisions from earlier runs; only terms without a decision go to the LLM
+CACHE_FILE = 'data/term_filter_cache.json'
+PROMPT_VERSION = 1  # Bump whenever build_prompt's rules change so cached decisions are discarded
+decision_cache = {}
+if os.path.exists(CACHE_FILE):
+    cached = read_json(CACHE_FILE)
+    if isinstance(cached, dict) and cached.get('prompt_version') == PROMPT_VERSION:
+        decision_cache = cached['decisions']
+    else:
+        print(f"   [CACHE] Ignoring {CACHE_FILE}: made with a different prompt version")
 
-# Filter terms in batches (250 terms = smaller output to avoid token limit truncation)
-BATCH_SIZE = 250
-num_batches = (len(terms) + BATCH_SIZE - 1) // BATCH_SIZE
+# Decisions appended batch by batch during a run; left behind only if that run was interrupted
+PARTIAL_FILE = 'data/term_filter_cache.partial.jsonl'
+if os.path.exists(PARTIAL_FILE):
+    resumed = 0
+    with open(PARTIAL_FILE, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Line torn by the interruption
+            if record.get('prompt_version') == PROMPT_VERSION:
+                decision_cache.update(record['decisions'])
+                resumed += len(record['decisions'])
+    print(f"   [RESUME] Recovered {resumed} decisions from an interrupted run ({PARTIAL_FILE})")
+unknown_terms = [t for t in terms if t not in decision_cache]
+print(f"   Cached decisions: {len(terms) - len(unknown_terms)} ({len(unknown_terms)} new terms)")
 
-print(f"3. Filtering terms with LLM...")
-print(f"   Batching: {num_batches} batches of {BATCH_SIZE} terms each")
-print(f"   Rate limit: 15 requests/minute (5 seconds between batches)")
-print(f"   Estimated time: ~{num_batches * 5 / 60:.1f} minutes")
-print(f"   Progress will be shown for each batch")
-print()
+# Deterministic pre-pass: the prompt's clear-cut KEEP/EXCLUDE rules need no LLM call
+LAW_CODE_RE = re.compile(r'^[A-Z]{2}\d{4}$')  # BA1933, TA1813
+PANIC_RE = re.compile(r'^Panic of \d{4}$')
+# Single words the prompt always excludes (case-insensitive). "widow" is on both prompt lists, so the LLM decides it
+ALWAYS_EXCLUDE = frozenset({
+    # Common first names
+    'edward', 'frederick', 'john', 'william', 'george', 'charles', 'james', 'robert',
+    'thomas', 'samuel', 'daniel', 'benjamin', 'joseph', 'david', 'henry',
+    # Relationship/family words
+    'son', 'daughter', 'father', 'mother', 'brother', 'sister',
+    # Generic titles
+    'president', 'director', 'governor', 'minister', 'chairman', 'secretary',
+    # Generic banking words
+    'bank', 'credit', 'trust', 'loan',
+    # Common place names when standalone
+    'boston', 'chicago', 'paris',
+    # Generic descriptive words
+    'era', 'period', 'significant',
+})
 
-filtered_terms = []
 
-progress_bar = tqdm(range(0, len(terms), BATCH_SIZE), desc="Filtering batches", unit="batch")
-for i in progress_bar:
-    batch = terms[i:i+BATCH_SIZE]
-    batch_num = i//BATCH_SIZE + 1
-    
-    # Update progress bar description with current stats
-    progress_bar.set_description(f"Batch {batch_num}/{num_batches} ({batch_num*100//num_batches}%)")
-    
-    # Pre-filter: Keep ALL acronyms (3+ caps) without sending to LLM
-    acronyms_in_batch = [t for t in batch if t.isupper() and len(t) >= 3]
-    non_acronyms = [t for t in batch if not (t.isupper() and len(t) >= 3)]
-    
-    # Add acronyms directly to filtered list (don't send to LLM)
-    filtered_terms.extend(acronyms_in_batch)
-    
-    # If entire batch is acronyms, skip LLM call
-    if not non_acronyms:
-        continue
-    
-    # Wait BEFORE making request (except first batch) to respect 15 RPM limit
-    if i > 0:
-        time.sleep(5)  # 5 seconds = 12 requests/minute (safe margin under 15 RPM)
-    
-    # Create a FRESH LLM client for each batch
-    llm = LLMAnswerGenerator()
-    
-    prompt = f"""You are filtering indexed terms for a historical banking database for hyperlinking.
+def prefilter_decision(term):
+    """True/False when the rules decide term outright, None when the LLM has to judge it."""
+    # Acronyms 3+ caps (cheap length test first so isupper() only scans candidates)
+    if len(term) >= 3 and term.isupper():
+        return True
+    if LAW_CODE_RE.match(term) or PANIC_RE.match(term):
+        return True
+    if term.lower() in ALWAYS_EXCLUDE:
+        return False
+    return None
+
+
+# Undecided terms grouped by normalized form ("Jewish"/"jewish"); only the first form of each
+# group goes to the LLM and its decision is applied to every form in the group
+llm_groups = {}
+for term in unknown_terms:
+    decision = prefilter_decision(term)
+    if decision is None:
+        key = unicodedata.normalize('NFKC', term).strip().casefold()
+        llm_groups.setdefault(key, []).append(term)
+    else:
+        decision_cache[term] = decision
+forms_by_term = {forms[0]: forms for forms in llm_groups.values()}
+llm_terms = list(forms_by_term)
+undecided = sum(len(forms) for forms in llm_groups.values())
+print(f"   Decided by rules: {len(unknown_terms) - undecided}, merged variant forms: {undecided - len(llm_terms)} (sending {len(llm_terms)} terms to LLM)")
+print()
+
+# Fixed instructions, sent once as the client's system prompt; each call carries only its terms
+FILTER_INSTRUCTIONS = """You are filtering indexed terms for a historical banking database for hyperlinking.
 
 Return ONLY terms that would be USEFUL and MEANINGFUL to hyperlink. Be VERY selective - exclude anything common or generic.
 
@@ -94,48 +158,215 @@ Return ONLY terms that would be USEFUL and MEANINGFUL to hyperlink. Be VERY sele
 
 Rule: If it's a SINGLE WORD and COMMON, EXCLUDE IT.
 
-**Terms to filter:**
-{json.dumps(non_acronyms)}
-
 **Output:** JSON array of terms to KEEP. No explanations.
 """
+
+REQUEST_TIMEOUT = 120  # Seconds per LLM call; a hung call is retried instead of stalling its batch
+
+# Test LLM initialization (the same generator is shared by every batch)
+print("2. Testing LLM...")
+llm = LLMAnswerGenerator(system_instruction=FILTER_INSTRUCTIONS, request_timeout=REQUEST_TIMEOUT)
+if not llm.client:
+    print("ERROR: LLM initialization failed!")
+    sys.exit(1)
+print()
+
+# Filter terms in batches packed by estimated tokens rather than a fixed count: the reply
+# echoes kept terms, so bounding the input also keeps the output clear of truncation
+BATCH_TOKEN_BUDGET = 1500  # Estimated tokens of terms per batch (~250 typical terms)
+MAX_BATCH_TERMS = 400  # Cap on terms per batch however short they are
+CONCURRENCY = 4  # Batches in flight at once
+REQUEST_INTERVAL = 5  # Seconds between request starts = 12 requests/minute (safe margin under 15 RPM)
+
+
+def pack_batches(candidate_terms):
+    """Greedily fill batches up to BATCH_TOKEN_BUDGET estimated tokens / MAX_BATCH_TERMS terms."""
+    batches = []
+    batch = []
+    batch_tokens = 0
+    for term in candidate_terms:
+        # Term plus its quotes, comma and space in the JSON array
+        term_tokens = (len(term) + 4) // CHARS_PER_TOKEN + 1
+        if batch and (batch_tokens + term_tokens > BATCH_TOKEN_BUDGET or len(batch) >= MAX_BATCH_TERMS):
+            batches.append(batch)
+            batch = []
+            batch_tokens = 0
+        batch.append(term)
+        batch_tokens += term_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+batches = pack_batches(llm_terms)
+num_batches = len(batches)
+
+print(f"3. Filtering terms with LLM...")
+print(f"   Batching: {num_batches} batches of up to ~{BATCH_TOKEN_BUDGET} tokens ({MAX_BATCH_TERMS} terms) each")
+print(f"   Rate limit: 15 requests/minute ({REQUEST_INTERVAL} seconds between request starts, up to {CONCURRENCY} in flight)")
+print(f"   Estimated time: ~{num_batches * REQUEST_INTERVAL / 60:.1f} minutes")
+print(f"   Progress will be shown for each batch")
+print()
+
+
+def build_prompt(candidate_terms):
+    """Per-call prompt: just the terms to filter (the rules are in FILTER_INSTRUCTIONS)."""
+    terms_json = orjson.dumps(candidate_terms).decode() if orjson is not None else json.dumps(candidate_terms)
+    return f"""**Terms to filter:**
+{terms_json}
+"""
+
+
+# A complete JSON string, or an array bracket (for tracking nesting depth)
+_ARRAY_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[\[\]]')
+
+
+def recover_array_strings(text):
+    """Top-level string elements of a JSON array, up to the last complete one if the text is cut off."""
+    items = []
+    depth = 0
+    for match in _ARRAY_TOKEN_RE.finditer(text):
+        token = match.group(0)
+        if token == '[':
+            depth += 1
+        elif token == ']':
+            depth -= 1
+            if depth == 0:
+                break
+        elif depth == 1:
+            items.append(json.loads(token))
+    return items
+
+
+def parse_kept_terms(response_text):
+    """
+    Extract the JSON array of kept terms from an LLM response.
     
+    Returns (terms, complete). A reply truncated mid-array still yields its complete
+    elements, with complete=False.
+    """
+    response_text = response_text.strip()
+    if '```json' in response_text:
+        response_text = response_text.split('```json')[1].split('```')[0].strip()
+    elif '```' in response_text:
+        response_text = response_text.split('```')[1].split('```')[0].strip()
     try:
-        response_text = llm.call_api(prompt).strip()
+        return (orjson.loads(response_text) if orjson is not None else json.loads(response_text)), True
+    except ValueError:
+        if '[' not in response_text:
+            raise
+        return recover_array_strings(response_text), False
+
+
+async def filter_all_batches():
+    """
+    Run the LLM batches concurrently, starting at most one request every
+    REQUEST_INTERVAL seconds. Decisions go into decision_cache and are appended to PARTIAL_FILE
+    as each batch finishes; returns the terms of failed batches (kept as a fallback, not
+    cached, so they are retried next run).
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    schedule_lock = asyncio.Lock()
+    next_start = [loop.time()]
+    
+    async def wait_for_slot():
+        # Reserve the next start slot, then sleep until it arrives
+        async with schedule_lock:
+            start_at = max(loop.time(), next_start[0])
+            next_start[0] = start_at + REQUEST_INTERVAL
+        await asyncio.sleep(max(0.0, start_at - loop.time()))
+    
+    async def filter_batch(batch_num, batch):
+        async with semaphore:
+            await wait_for_slot()
+            try:
+                # One shared client: call_api_async keeps no per-call state on the generator
+                kept_terms, complete = parse_kept_terms(await llm.call_api_async(build_prompt(batch)))
+                if complete:
+                    return batch_num, batch, kept_terms, None, []
+                # Truncated reply: only the recovered terms are decided (kept). The reply order is
+                # not guaranteed to follow the batch, so every other term is left undecided
+                kept_set = set(kept_terms)
+                decided = [term for term in batch if term in kept_set]
+                if not decided:
+                    raise ValueError("Truncated response with no recoverable terms")
+                undecided = [term for term in batch if term not in kept_set]
+                print(f"\n   [WARN] Batch {batch_num} reply was truncated: recovered {len(decided)} kept terms, {len(undecided)} terms left undecided")
+                return batch_num, decided, decided, None, undecided
+            except Exception as e:
+                return batch_num, batch, None, e, []
+    
+    tasks = [filter_batch(batch_num, batch) for batch_num, batch in enumerate(batches, 1)]
+    
+    kept = set()  # Distinct terms kept so far, for progress output
+    fallback_terms = []
+    done_batches = 0
+    partial_file = open(PARTIAL_FILE, 'a', encoding='utf-8')
+    progress_bar = tqdm(asyncio.as_completed(tasks), total=len(tasks), desc="Filtering batches", unit="batch")
+    for next_result in progress_bar:
+        batch_num, batch, kept_terms, error, undecided_terms = await next_result
+        done_batches += 1
+        
+        # Terms a truncated reply never reached are handled like a failed batch
+        kept.update(undecided_terms)
+        for term in undecided_terms:
+            fallback_terms.extend(forms_by_term[term])
         
-        # Extract JSON from response
-        if '```json' in response_text:
-            response_text = response_text.split('```json')[1].split('```')[0].strip()
-        elif '```' in response_text:
-            response_text = response_text.split('```')[1].split('```')[0].strip()
+        if error is not None:
+            print(f"\n   [ERROR] Batch {batch_num} failed: {str(error)[:300]}")
+            print(f"   [FALLBACK] Keeping all {len(batch)} terms from this batch")
+            kept.update(batch)
+            for term in batch:
+                fallback_terms.extend(forms_by_term[term])
+            continue
         
-        kept_terms = json.loads(response_text)
-        filtered_terms.extend(kept_terms)
+        kept.update(kept_terms)
+        # Terms sent to the LLM but not returned are recorded as dropped
+        kept_set = set(kept_terms)
+        batch_decisions = {}
+        for term in batch:
+            decision = term in kept_set
+            for form in forms_by_term[term]:
+                batch_decisions[form] = decision
+        decision_cache.update(batch_decisions)
+        # Persist now so an interrupted run can resume without repeating this batch
+        partial_file.write(json.dumps({'prompt_version': PROMPT_VERSION, 'decisions': batch_decisions}, ensure_ascii=False) + "\n")
+        partial_file.flush()
+        os.fsync(partial_file.fileno())
         
         # Calculate statistics
         kept_pct = (len(kept_terms) / len(batch)) * 100
         removed_pct = 100 - kept_pct
-        overall_pct = (batch_num / num_batches) * 100
-        total_removed_so_far = (batch_num * BATCH_SIZE) - len(filtered_terms)
+        overall_pct = (done_batches / num_batches) * 100
         
         # Update progress bar with detailed stats
         progress_bar.set_postfix({
             'kept': f'{len(kept_terms)}/{len(batch)}',
-            'total': len(filtered_terms),
-            'removed': total_removed_so_far
+            'total': len(kept),
         })
         
         # Show detailed progress every 5 batches
-        if batch_num % 5 == 0:
-            acronyms_kept = len(acronyms_in_batch)
-            print(f"\n   ✅ Batch {batch_num}/{num_batches} ({overall_pct:.0f}%): Kept {len(kept_terms)+acronyms_kept}/{len(batch)} ({kept_pct:.0f}%), Removed {len(batch)-len(kept_terms)-acronyms_kept} ({removed_pct:.0f}%)")
-            print(f"      Total: {len(filtered_terms)} kept ({acronyms_kept} acronyms auto-kept), {total_removed_so_far} removed")
-        
-    except Exception as e:
-        print(f"\n   [ERROR] Batch {batch_num} failed: {str(e)[:300]}")
-        print(f"   [FALLBACK] Keeping all {len(batch)} terms from this batch")
-        filtered_terms.extend(batch)
-        time.sleep(15)  # Wait longer after error
+        if done_batches % 5 == 0:
+            print(f"\n   ✅ Batch {batch_num}/{num_batches} ({overall_pct:.0f}% done): Kept {len(kept_terms)}/{len(batch)} ({kept_pct:.0f}%), Removed {len(batch)-len(kept_terms)} ({removed_pct:.0f}%)")
+            print(f"      Total: {len(kept)} kept so far")
+    
+    partial_file.close()
+    return fallback_terms
+
+
+fallback_terms = asyncio.run(filter_all_batches())
+
+# Save decisions atomically so an interrupted write can't corrupt the cache
+tmp_cache_file = CACHE_FILE + '.tmp'
+write_json(tmp_cache_file, {'prompt_version': PROMPT_VERSION, 'decisions': decision_cache})
+os.replace(tmp_cache_file, CACHE_FILE)
+# Everything in the partial file is now in the cache
+if os.path.exists(PARTIAL_FILE):
+    os.remove(PARTIAL_FILE)
+
+filtered_terms = {t for t in terms if decision_cache.get(t)}
+filtered_terms.update(fallback_terms)
 
 print()
 print(f"4. Filtering complete!")
@@ -147,8 +378,7 @@ print()
 # Save filtered terms list
 output_file = 'data/filtered_terms.json'
 print(f"5. Saving filtered terms to {output_file}...")
-with open(output_file, 'w', encoding='utf-8') as f:
-    json.dump(sorted(set(filtered_terms)), f, indent=2, ensure_ascii=False)
+write_json(output_file, sorted(filtered_terms), indent=True)
 
 print()
 print("="*80)
@@ -10,23 +10,55 @@ Advantages:
 
 import sys
 import os
+import pickle
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from lib.batch_identity_detector import BatchIdentityDetector
 from lib.document_parser import load_all_documents
 from lib.index_builder import split_into_chunks
+from lib.config import SOURCE_DOCS_DIR, CACHE_DIR, CHUNKS_PICKLE_FILE, CHUNK_SIZE, CHUNK_OVERLAP
 
-def main():
-    print("=== BATCH IDENTITY DETECTION ===\n")
+
+def corpus_signature():
+    """Source .docx names + mtimes and the chunk settings: chunking output depends on nothing else."""
+    docx_files = sorted(f for f in os.listdir(SOURCE_DOCS_DIR)
+                        if f.endswith('.docx') and not f.startswith('~'))
+    return ([(f, os.path.getmtime(os.path.join(SOURCE_DOCS_DIR, f))) for f in docx_files],
+            CHUNK_SIZE, CHUNK_OVERLAP)
+
+
+def load_chunks():
+    """Chunk every document, reusing the pickled chunk list while the corpus is unchanged."""
+    signature = corpus_signature()
+    if os.path.exists(CHUNKS_PICKLE_FILE):
+        try:
+            with open(CHUNKS_PICKLE_FILE, 'rb') as f:
+                # Signature is pickled first, so a stale cache is rejected without loading the chunks
+                if pickle.load(f) == signature:
+                    print(f"[CACHE] Using cached chunks ({CHUNKS_PICKLE_FILE})")
+                    return pickle.load(f)
+        except Exception as e:
+            print(f"[WARNING] Ignoring unreadable chunk cache: {e}")
     
-    # Load chunks
-    print("Loading document chunks...")
     docs = load_all_documents(use_cache=True)
-    
     chunks = []
     for doc in docs:
         chunks.extend(split_into_chunks(doc['text']))
     
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(CHUNKS_PICKLE_FILE, 'wb') as f:
+        pickle.dump(signature, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(chunks, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return chunks
+
+
+def main():
+    print("=== BATCH IDENTITY DETECTION ===\n")
+    
+    # Load chunks
+    print("Loading document chunks...")
+    chunks = load_chunks()
+    
     print(f"  [OK] Loaded {len(chunks)} chunks\n")
     
     # Initialize detector
@@ -1,12 +1,23 @@
 import json
 
-data = json.load(open('data/identity_detection_v3.json', encoding='utf-8'))
-identities = data['identities']
+# Optional: ijson streams the file, so each identity's chunk_ids list is dropped as soon as it's read
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Only the chunk counts are needed
+if ijson is not None:
+    with open('data/identity_detection_v3.json', 'rb') as f:
+        chunk_counts = {id: info['chunk_count'] for id, info in ijson.kvitems(f, 'identities')}
+else:
+    data = json.load(open('data/identity_detection_v3.json', encoding='utf-8'))
+    chunk_counts = {id: info['chunk_count'] for id, info in data['identities'].items()}
 
 # Sort by chunk count
-sorted_ids = sorted(identities.keys(), key=lambda x: identities[x]['chunk_count'], reverse=True)
+sorted_ids = sorted(chunk_counts, key=chunk_counts.get, reverse=True)
 
 print('\n=== ALL 342 IDENTITIES (sorted by chunk count) ===\n')
 for id in sorted_ids:
-    print(f'{id:30s} {identities[id]["chunk_count"]:4d} chunks')
+    print(f'{id:30s} {chunk_counts[id]:4d} chunks')
 
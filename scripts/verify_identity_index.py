@@ -10,16 +10,31 @@ import json
 import sys
 sys.path.insert(0, '.')
 
-def verify_identity_integration(identity_name='sunni'):
-    """Verify a specific identity is properly integrated."""
-    
-    # Load detection results
-    data = json.load(open('data/identity_detection_v3.json', encoding='utf-8'))
-    detected = data['identities'].get(identity_name, {})
+# Optional: ijson streams indices.json so only the requested terms' chunk lists are kept
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+def load_term_chunks(terms, indices_file='data/indices.json'):
+    """Return {term: chunk_ids} from the index's term_to_chunks for just the given terms."""
+    wanted = set(terms)
+    if ijson is not None:
+        with open(indices_file, 'rb') as f:
+            return {term: chunk_ids for term, chunk_ids in ijson.kvitems(f, 'term_to_chunks')
+                    if term in wanted}
+    term_to_chunks = json.load(open(indices_file, encoding='utf-8')).get('term_to_chunks', {})
+    return {term: term_to_chunks[term] for term in wanted if term in term_to_chunks}
+
+
+def verify_identity_integration(identity_name, detection, term_to_chunks):
+    """
+    Verify a specific identity is properly integrated.
     
-    # Load index
-    indices = json.load(open('data/indices.json', encoding='utf-8'))
-    term_to_chunks = indices.get('term_to_chunks', {})
+    detection and term_to_chunks are loaded once by the caller and shared across identities.
+    """
+    detected = detection['identities'].get(identity_name, {})
     indexed = term_to_chunks.get(identity_name, [])
     
     print('=' * 60)
@@ -54,7 +69,11 @@ if __name__ == '__main__':
     # Test multiple identities
     test_identities = ['sunni', 'alawite', 'black', 'gay', 'quaker']
     
+    # Load both files once, not once per identity
+    detection = json.load(open('data/identity_detection_v3.json', encoding='utf-8'))
+    term_to_chunks = load_term_chunks(test_identities)
+    
     for identity in test_identities:
-        verify_identity_integration(identity)
+        verify_identity_integration(identity, detection, term_to_chunks)
         print('\n')
 
@@ -10,18 +10,44 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from fastapi import FastAPI, HTTPException, Request, Response, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict
-from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from collections import OrderedDict, deque
 import time
+import threading
 import uuid
 import json
+import re
+import traceback
+
+# Optional: orjson serializes responses (long answers while clients poll) faster than json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+JSON_RESPONSE = ORJSONResponse if orjson is not None else JSONResponse
 
 # Import query engine
 from lib.query_engine import QueryEngine
-from lib.config import MAX_ANSWER_LENGTH
+from lib.config import MAX_ANSWER_LENGTH, QUERY_TIMEOUT_SECONDS
+
+QUERY_WORKERS = 8  # Queries run concurrently on worker threads (LLM waits overlap)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One QueryEngine for the server's lifetime: the ChromaDB connection, indices and LLM
+    # client are set up once at startup instead of on every query
+    app.state.qe = QueryEngine(gemini_api_key=gemini_key, use_async=False)
+    # QueryEngine.query is synchronous; running it here keeps the event loop free
+    app.state.pool = ThreadPoolExecutor(max_workers=QUERY_WORKERS, thread_name_prefix="qe")
+    yield
+    app.state.pool.shutdown(wait=False)
 
-app = FastAPI(title="Thunderclap AI")
+app = FastAPI(title="Thunderclap AI", lifespan=lifespan, default_response_class=JSON_RESPONSE)
 
 # CORS - Allow requests from GitHub Pages and localhost
 # Note: When allow_credentials=True, you cannot use allow_origins=["*"]
@@ -41,16 +67,14 @@ app.add_middleware(
     expose_headers=["*"],  # expose X-Request-ID to browser
 )
 
-# Store API key for creating QueryEngine instances
+# Store API key for creating the shared QueryEngine at startup
 gemini_key = os.getenv('GEMINI_API_KEY')
 if not gemini_key:
     print("ERROR: GEMINI_API_KEY environment variable not set!")
     sys.exit(1)
 
 print("Initializing Thunderclap AI...")
-print("Server ready! (QueryEngine created per-request)\n")
-
-from lib.config import MAX_ANSWER_LENGTH
+print("Server ready! (QueryEngine created at startup and shared across requests)\n")
 
 class QueryRequest(BaseModel):
     question: str
@@ -70,16 +94,53 @@ class QueryStatusResponse(BaseModel):
     chunk_count: Optional[int] = None  # Number of chunks being processed
 
 # Rate limiting (per-IP, highly relaxed to avoid local dev throttling)
-request_counts = defaultdict(list)
+# Token bucket per IP: (tokens, last_refill) refilled at RATE_LIMIT per hour, O(1) per check.
+# Least recently seen IPs are evicted past RATE_LIMIT_MAX_IPS so memory stays bounded.
 RATE_LIMIT = 10000  # requests per hour
+RATE_LIMIT_MAX_IPS = 10000  # IP buckets kept before evicting the least recently seen
+rate_buckets: "OrderedDict[str, tuple]" = OrderedDict()
+rate_lock = threading.Lock()
 
 def check_rate_limit(ip: str):
-    now = time.time()
-    hour_ago = now - 3600
-    request_counts[ip] = [t for t in request_counts[ip] if t > hour_ago]
-    if len(request_counts[ip]) >= RATE_LIMIT:
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
-    request_counts[ip].append(now)
+    now = time.monotonic()
+    with rate_lock:
+        tokens, last = rate_buckets.get(ip, (RATE_LIMIT, now))
+        tokens = min(RATE_LIMIT, tokens + (now - last) * (RATE_LIMIT / 3600))
+        if tokens < 1:
+            rate_buckets[ip] = (tokens, now)
+            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+        rate_buckets[ip] = (tokens - 1, now)
+        rate_buckets.move_to_end(ip)
+        if len(rate_buckets) > RATE_LIMIT_MAX_IPS:
+            rate_buckets.popitem(last=False)
+
+# Answers to recent questions, matched on normalized text (case, spacing, ?.! ignored).
+# Exact match only: the engine loads no embedding model to match paraphrases with.
+ANSWER_CACHE_MAX = 1000  # Answers kept before evicting the least recently used
+ANSWER_CACHE_TTL = 24 * 3600  # Seconds an answer stays valid
+answer_cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, answer, chunk_count)
+_QUESTION_NOISE_RE = re.compile(r'[\s?.!]+')
+
+def answer_cache_key(question: str) -> str:
+    return _QUESTION_NOISE_RE.sub(' ', question.casefold()).strip()
+
+def get_cached_answer(key: str):
+    """(answer, chunk_count) for a fresh cached answer, else None. Called from the event loop only."""
+    entry = answer_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, answer, chunk_count = entry
+    if time.monotonic() - stored_at > ANSWER_CACHE_TTL:
+        del answer_cache[key]
+        return None
+    answer_cache.move_to_end(key)
+    return answer, chunk_count
+
+def store_answer(key: str, answer: str, chunk_count: Optional[int]):
+    answer_cache[key] = (time.monotonic(), answer, chunk_count)
+    answer_cache.move_to_end(key)
+    if len(answer_cache) > ANSWER_CACHE_MAX:
+        answer_cache.popitem(last=False)
 
 TRACE_BUFFER = deque(maxlen=200)
 JOB_STORE: Dict[str, Dict] = {}  # Store job status and results
@@ -92,7 +153,7 @@ def trace_event(request_id: str, event: str, **fields):
         **fields,
     }
     TRACE_BUFFER.append(entry)
-    print("[TRACE]", json.dumps(entry))
+    print("[TRACE]", orjson.dumps(entry).decode() if orjson is not None else json.dumps(entry))
 
 @app.get("/")
 async def root():
@@ -109,9 +170,15 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+def run_query(qe: QueryEngine, question: str):
+    """Run one query on a worker thread; returns (answer, chunk_count, is_fallback) for that query."""
+    # last_chunk_count is per-thread, so clear what an earlier query on this thread left
+    qe.last_chunk_count = None
+    answer = qe.query(question, use_llm=True)
+    return answer, qe.last_chunk_count, qe.last_answer_is_fallback
+
 async def process_query_job(job_id: str, question: str, max_length: int):
     """Background task to process query."""
-    import sys
     JOB_STORE[job_id]["status"] = "processing"
     JOB_STORE[job_id]["start_time"] = time.time()
     
@@ -119,13 +186,30 @@ async def process_query_job(job_id: str, question: str, max_length: int):
         print(f"[JOB {job_id}] Starting query processing...")
         sys.stdout.flush()
         
-        from lib.query_engine import QueryEngine
-        qe = QueryEngine(gemini_api_key=gemini_key, use_async=False)
-        answer = qe.query(question, use_llm=True)
+        cache_key = answer_cache_key(question)
+        cached = get_cached_answer(cache_key)
+        if cached is not None:
+            print(f"[JOB {job_id}] Answer cache hit")
+            answer, chunk_count = cached
+        else:
+            loop = asyncio.get_running_loop()
+            try:
+                answer, chunk_count, is_fallback = await asyncio.wait_for(
+                    loop.run_in_executor(app.state.pool, run_query, app.state.qe, question),
+                    timeout=QUERY_TIMEOUT_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                # The job is failed here, but the worker thread cannot be interrupted: it keeps its
+                # QUERY_WORKERS slot until qe.query returns (bounded by the LLM client's own retry limit)
+                raise TimeoutError(f"Query exceeded {QUERY_TIMEOUT_SECONDS}s")
+            # Cache the full answer (truncation is per request); never cache the engine's fallback
+            # messages (no results, timeout, LLM failure), so a repeat of the question retries
+            if answer and not is_fallback:
+                store_answer(cache_key, answer, chunk_count)
         
         # Store chunk count for time estimation (if available)
-        if hasattr(qe, 'last_chunk_count'):
-            JOB_STORE[job_id]["chunk_count"] = qe.last_chunk_count
+        if chunk_count is not None:
+            JOB_STORE[job_id]["chunk_count"] = chunk_count
         
         if len(answer) > max_length:
             answer = answer[:max_length] + "\n\n[Truncated]"
@@ -147,7 +231,6 @@ async def process_query_job(job_id: str, question: str, max_length: int):
         JOB_STORE[job_id]["elapsed"] = elapsed
         
         print(f"[JOB {job_id}] Error: {error_type}: {error_msg}")
-        import traceback
         traceback.print_exc()
         sys.stdout.flush()
 
@@ -162,14 +245,16 @@ async def get_query_status(job_id: str):
     if "start_time" in job:
         elapsed = time.time() - job["start_time"]
     
-    return QueryStatusResponse(
-        job_id=job_id,
-        status=job.get("status", "pending"),
-        answer=job.get("answer"),
-        error=job.get("error"),
-        elapsed=elapsed,
-        chunk_count=job.get("chunk_count")
-    )
+    # Returned as a response directly: response_model only documents the shape, the fields
+    # are built here, so FastAPI skips re-validating them on every poll
+    return JSON_RESPONSE({
+        "job_id": job_id,
+        "status": job.get("status", "pending"),
+        "answer": job.get("answer"),
+        "error": job.get("error"),
+        "elapsed": elapsed,
+        "chunk_count": job.get("chunk_count"),
+    })
 
 @app.post("/query", response_model=QueryJobResponse)
 async def query(req: QueryRequest, http_req: Request, background_tasks: BackgroundTasks):
@@ -200,14 +285,13 @@ async def query(req: QueryRequest, http_req: Request, background_tasks: Backgrou
     
     trace_event(job_id, "job_created", question=req.question[:100])
     print(f"[SERVER] Job {job_id} created for: {req.question[:60]}...")
-    import sys
     sys.stdout.flush()
     
-    return QueryJobResponse(
-        job_id=job_id,
-        status="pending",
-        message="Query processing started. Poll /query/{job_id} for status."
-    )
+    return JSON_RESPONSE({
+        "job_id": job_id,
+        "status": "pending",
+        "message": "Query processing started. Poll /query/{job_id} for status.",
+    })
 
 @app.get("/debug/last")
 def debug_last(n: int = 50):